@@ -7,8 +7,7 @@ function TravelChatBot() {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState("");
   const [userLocation, setUserLocation] = useState(null);
-  const [chatHistory, setChatHistory] = useState([]);
-  const [lastKnownCity, setLastKnownCity] = useState(null);
+  const [conversationId, setConversationId] = useState(null);
   const [isTyping, setIsTyping] = useState(false);
   const messagesEndRef = useRef(null);
 
@@ -35,42 +34,88 @@ function TravelChatBot() {
   const sendMessage = async () => {
     if (!input.trim()) return;
 
-    const userMsg = { role: "user", content: input };
-    const updatedHistory = [...chatHistory, userMsg];
-
     // Add user message to UI
     setMessages((prev) => [...prev, { sender: "user", text: input }]);
     setInput("");
     setIsTyping(true);
 
+    // The bot bubble is added on the first streamed event and then grown in place
+    let botBubbleAdded = false;
+    const updateBotText = (text) => {
+      const replaceLast = botBubbleAdded;
+      botBubbleAdded = true;
+      setMessages((prev) =>
+        replaceLast
+          ? [...prev.slice(0, -1), { sender: "bot", text }]
+          : [...prev, { sender: "bot", text }]
+      );
+    };
+
     try {
-      const res = await fetch("http://127.0.0.1:5000/chat", {
+      const res = await fetch("http://127.0.0.1:5000/chat/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
+        // History and last known city live on the server; only send the new message
         body: JSON.stringify({
+          conversationId: conversationId,
           message: input,
-          history: updatedHistory, // ✅ always send full history
           location: userLocation,
-          lastKnownCity: lastKnownCity,
         }),
       });
 
-      const data = await res.json();
-
-      if (data.city) {
-        setLastKnownCity(data.city);
+      if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+      let confirmText = "";
+      let streamedText = "";
+      let finalData = null;
+
+      const handleEvent = (event, data) => {
+        if (event === "confirm") {
+          confirmText = data;
+          setIsTyping(false);
+          updateBotText(`${confirmText}\n\n`);
+        } else if (event === "token") {
+          streamedText += data;
+          setIsTyping(false);
+          updateBotText(confirmText ? `${confirmText}\n\n${streamedText}` : streamedText);
+        } else if (event === "done") {
+          finalData = data;
+        } else if (event === "error") {
+          throw new Error(data.response);
+        }
+      };
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+          const raw = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          let event = "message";
+          let data = "";
+          for (const line of raw.split("\n")) {
+            if (line.startsWith("event:")) event = line.slice(6).trim();
+            else if (line.startsWith("data:")) data += line.slice(5).trim();
+          }
+          if (data) handleEvent(event, JSON.parse(data));
+        }
       }
 
-      const botMsg = { role: "assistant", content: data.response };
+      if (!finalData) throw new Error("Stream ended without a response");
+
+      if (finalData.conversationId) {
+        setConversationId(finalData.conversationId);
+      }
 
-      // Update chat history and UI with bot response
-      setChatHistory((prev) => [...prev, userMsg, botMsg]); // ✅ store both sides of conversation
-      setMessages((prev) => [...prev, { sender: "bot", text: data.response }]);
+      updateBotText(finalData.response);
     } catch (err) {
-      setMessages((prev) => [
-        ...prev,
-        { sender: "bot", text: "There was an error. Please try again." },
-      ]);
+      updateBotText("There was an error. Please try again.");
     } finally {
       setIsTyping(false);
     }
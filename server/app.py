@@ -1,61 +1,480 @@
-from flask import Flask, request, jsonify
-from dotenv import load_dotenv
 import os
-from openai import OpenAI
-from utils.tools import search_flights, search_hotels, recommend_destinations, calculate_travel_budget, recommend_tours, get_iata_code
+import json
+import asyncio
+import threading
+from dotenv import load_dotenv
+
+# Load environment variables once, before the utils modules read their settings
+load_dotenv()
+
+from flask import Flask, Response, request, jsonify, stream_with_context
+from utils.tools import confirmation_message, search_flights, search_fare_calendar, plan_itinerary, search_hotels, recommend_destinations, calculate_travel_budget, recommend_tours, get_iata_code
+from utils.cache import location_cache, shopping_cache, route_cache
+from utils.async_bridge import run_sync, iter_sync, set_executor_workers
+from utils.sessions import create_session_store, new_session, new_conversation_id
+from utils.history import compact_history, refresh_summary
+from utils.tool_io import parse_tool_arguments, serialize_tool_output, ToolArgumentError
+from utils.router import get_router, GREETING, TRAVEL, OFF_TOPIC
+from utils.upstream import get_breaker, breaker_stats, budget, set_deadline, UpstreamUnavailable
+from utils.admission import create_admission_controller
+from utils.metrics import span, record_usage, start_request_timing, server_timing_header, render_prometheus, register_collector
 from tool_schemas import tools
 from flask_cors import CORS
-from dateparser import parse as parse_date
-from datetime import datetime
 
-# Load environment and OpenAI client
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-def is_greeting(message):
-    greetings = ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening', 'hi there', 'howdy', 'greetings']
-    return any(greet in message.lower() for greet in greetings)
-
-
-def parse_and_validate_date(raw_date, previous_date_str=None):
-    today = datetime.now()
-    current_year = today.year
-    next_year = current_year + 1
-    lower_date = raw_date.lower().strip()
-
-    # Handle "this year" or "next year" explicitly
-    if lower_date == "this year":
-        return datetime(today.year, 1, 1), "ok"
-    elif lower_date == "next year":
-        return datetime(today.year + 1, 1, 1), "ok"
-
-    # Parse the natural language date
-    parsed = parse_date(
-        raw_date,
-        settings={
-            "PREFER_DAY_OF_MONTH": "first",
-            "PREFER_DATES_FROM": "future",
-            "RELATIVE_BASE": today
-        }
+# Async OpenAI client so the guardrail and tool-selection completions can run concurrently.
+# It lives on the shared event loop, so its keep-alive pool is reused across requests;
+# the SDK retries 429/5xx itself with jittered backoff. openai and httpx are heavy imports,
+# so the client is built on first use rather than at startup.
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+                _client = AsyncOpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    max_retries=2,
+                    timeout=httpx.Timeout(60.0, connect=5.0),
+                    http_client=DefaultAsyncHttpxClient(
+                        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+                    )
+                )
+    return _client
+
+
+# Per-call deadlines (seconds), capped by what is left of the turn's REQUEST_DEADLINE
+LLM_TIMEOUTS = {"classify": 10, "select": 30, "followup": 60, "summarize": 15}
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "45"))
+session_store = create_session_store()
+admission = create_admission_controller()
+BUSY_RETRY_AFTER = os.getenv("BUSY_RETRY_AFTER", "2")
+
+GREETING_REPLY = "Hi! How can I assist you with your travel plans today?"
+UNAVAILABLE_REPLY = "Sorry, I'm having trouble reaching my travel services right now. Please try again in a moment."
+BUSY_REPLY = "I'm helping a lot of travellers right now. Please try again in a few seconds."
+OFF_TOPIC_REPLY = "I'm a travel planner here to help with your travel plans. Could you please rephrase your question in that context?"
+
+
+async def complete(name, **kwargs):
+    # Every OpenAI call goes through here: deadline, circuit breaker, timing and token counts.
+    # Streamed calls return the stream; the caller times and counts while consuming it.
+    from openai import APIConnectionError, RateLimitError, InternalServerError
+
+    client = get_client()
+    breaker = get_breaker("openai")
+    timeout = budget(LLM_TIMEOUTS.get(name, 30))
+    breaker.before_call()
+    try:
+        if kwargs.get("stream"):
+            response = await client.chat.completions.create(timeout=timeout, **kwargs)
+        else:
+            with span("llm", name):
+                response = await client.chat.completions.create(timeout=timeout, **kwargs)
+    except (APIConnectionError, RateLimitError, InternalServerError):
+        breaker.record_failure()
+        raise
+    except Exception:
+        breaker.record_success()
+        raise
+    except BaseException:
+        # Cancelled (classifier said no, stream client went away): no verdict on OpenAI
+        breaker.release_trial()
+        raise
+    breaker.record_success()
+
+    if not kwargs.get("stream"):
+        record_usage(kwargs.get("model"), response.usage)
+    return response
+
+
+async def classify_travel(user_input):
+    # ✳️ Guardrail: Check if input is travel-related
+    classification_prompt = f"""
+    Classify the following message. Is the user asking about travel (flights, hotels, destinations, tours, budget, cities, dates)? 
+    Answer only 'yes' or 'no'.
+
+    Message: \"{user_input}\"
+    """
+
+    classification_response = await complete(
+        "classify",
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "You are a classifier that answers with only 'yes' or 'no'."},
+            {"role": "user", "content": classification_prompt}
+        ]
     )
 
-    if not parsed:
-        return None, "unrecognized"
+    return classification_response.choices[0].message.content.strip().lower() == "yes"
+
+
+async def run_tool(func_name, args, user_location=None, last_known_city=None):
+    # Returns (tool_output, result, error). Tools are blocking, so they run in a worker thread.
+    if func_name == "search_flights":
+        print(f"[DEBUG] Calling {func_name} with arguments:", args)
+        required = ['origin', 'destination', 'departure_date']
+        if not all(arg in args and args[arg] for arg in required):
+            return None, {}, "Missing required flight search parameters."
+
+        result = await asyncio.to_thread(search_flights, **args)
+
+        if "error" in result:
+            return None, result, result["error"]
+
+        tool_output = {"flights": result.get("flights", []), "total_offers": result.get("total_offers", 0)}
+
+    elif func_name == "search_fare_calendar":
+        required = ['origin', 'destination', 'start_date']
+        if not all(arg in args and args[arg] for arg in required):
+            return None, {}, "Missing required fare calendar parameters."
+
+        result = await asyncio.to_thread(search_fare_calendar, **args)
+
+        if "error" in result:
+            return None, result, result["error"]
+
+        tool_output = {key: result[key] for key in ("origin", "destination", "cheapest", "days")}
+
+    elif func_name == "plan_itinerary":
+        result = await asyncio.to_thread(plan_itinerary, **args)
+
+        if "error" in result:
+            return None, result, result["error"]
+
+        tool_output = {
+            key: result[key] for key in ("route", "method", "optimized_for", "nights_per_city", "legs", "budget")
+        }
 
-    # Check if it's a partial date (e.g. "24th May") that could refer to a past month
-    if parsed.month < today.month or (parsed.month == today.month and parsed.day < today.day):
-        # The user probably meant next year
-        parsed = parsed.replace(year=next_year)
+    elif func_name == "search_hotels":
+        result = await asyncio.to_thread(search_hotels, **args)
+
+        if "error" in result:
+            return None, result, result["error"]
+
+        tool_output = result
+
+    elif func_name == "recommend_destinations":
+        result = await asyncio.to_thread(recommend_destinations, **args)
+        tool_output = result
+
+    elif func_name == "calculate_travel_budget":
+        result = await asyncio.to_thread(calculate_travel_budget, **args)
+        tool_output = result
+
+    elif func_name == "recommend_tours":
+        if "city" not in args or not args["city"]:
+            if last_known_city:
+                args["city"] = last_known_city
+            elif user_location:
+                args["user_location"] = user_location
+        result = await asyncio.to_thread(recommend_tours, **args)
+        tool_output = {
+            "activities": result.get("activities", []),
+            "city": result.get("city"),
+            "total_matches": result.get("total_matches", 0),
+            "page": result.get("page", 1),
+            "has_more": result.get("has_more", False)
+        }
     else:
-        # If still ambiguous (e.g., "25 July" and today is before that), stick to this year
-        parsed = parsed.replace(year=current_year)
+        result = {}
+        tool_output = {"error": "Unknown tool"}
+
+    return tool_output, result, None
+
+
+# Per-tool timeouts (seconds) and a cap on how many tools run at once per turn
+TOOL_TIMEOUTS = {
+    "search_flights": 20,
+    "search_fare_calendar": 40,
+    "plan_itinerary": 40,
+    "search_hotels": 20,
+    "recommend_tours": 20,
+}
+DEFAULT_TOOL_TIMEOUT = 10
+MAX_PARALLEL_TOOLS = 4
 
-    if parsed.date() < today.date():
-        return None, "past"
+# Enough tool threads for every admitted turn to run its tools in parallel; a tool that
+# timed out keeps its thread until it returns, which must not starve the other turns
+set_executor_workers(admission.max_active * MAX_PARALLEL_TOOLS)
 
-    return parsed, "ok"
 
+def tool_confirmation(tool_call):
+    try:
+        return confirmation_message(
+            tool_call.function.name,
+            parse_tool_arguments(tool_call.function.name, tool_call.function.arguments)
+        )
+    except ToolArgumentError:
+        # run_tool_call reports the bad arguments
+        return None
+    except Exception as e:
+        print(f"[DEBUG] {tool_call.function.name} confirmation failed:", e)
+        return None
+
+
+async def run_tool_call(tool_call, semaphore, user_location=None, last_known_city=None):
+    # A failing or slow tool reports an error for its own call instead of aborting the turn
+    func_name = tool_call.function.name
+    try:
+        args = parse_tool_arguments(func_name, tool_call.function.arguments)
+        async with semaphore:
+            with span("tool", func_name):
+                return await asyncio.wait_for(
+                    run_tool(func_name, args, user_location, last_known_city),
+                    timeout=budget(TOOL_TIMEOUTS.get(func_name, DEFAULT_TOOL_TIMEOUT))
+                )
+    except ToolArgumentError as e:
+        print(f"[DEBUG] {func_name} rejected arguments:", e)
+        return None, {}, str(e)
+    except asyncio.TimeoutError:
+        print(f"[DEBUG] {func_name} timed out")
+        return None, {}, f"The {func_name} request took too long. Please try again."
+    except UpstreamUnavailable as e:
+        # Open breaker or turn deadline hit outside a tool's own handling (e.g. a city lookup)
+        print(f"[DEBUG] {func_name} upstream unavailable:", e)
+        return None, {}, f"The {func_name} search is temporarily unavailable. Please try again in a moment."
+    except Exception as e:
+        print(f"[DEBUG] {func_name} failed:", e)
+        return None, {}, f"The {func_name} request failed."
+
+
+async def chat_events(payload):
+    # Yields (event, data) pairs for one chat turn. /chat collects the final "done"
+    # event; /chat/stream forwards every event to the client as it happens.
+    user_input = payload.get("message", "").strip()
+    chat_history = payload.get("history", [])
+    session = payload.get("session")
+    user_location = payload.get("location")
+    last_known_city = payload.get("lastKnownCity")
+
+    # Local router decides greetings and obvious travel/off-topic messages without an LLM call
+    route = get_router().route(user_input)
+    if route.intent == GREETING:
+        yield "done", {"response": GREETING_REPLY}
+        return
+    if route.intent == OFF_TOPIC:
+        yield "done", {"response": OFF_TOPIC_REPLY}
+        return
+
+    if session is not None:
+        # Recent turns verbatim plus the cached summary of older ones, so both gpt-4o calls
+        # see a bounded prompt however long the conversation gets
+        chat_history = compact_history(chat_history, session)
+
+    # Build conversation history
+    messages = [{"role": "system", "content": "You are a helpful travel assistant."}]
+    messages.extend(chat_history)
+    messages.append({"role": "user", "content": user_input})
+
+    # Start the guardrail and the main tool-selection call together; drop the
+    # main result if the classifier says the message isn't about travel
+    selection = asyncio.create_task(complete(
+        "select",
+        model="gpt-4o",
+        messages=messages,
+        tools=tools,
+        tool_choice="auto"
+    ))
+
+    if route.intent != TRAVEL:
+        try:
+            is_travel_related = await classify_travel(user_input)
+        except Exception:
+            selection.cancel()
+            raise
+
+        if not is_travel_related:
+            selection.cancel()
+            yield "done", {"response": OFF_TOPIC_REPLY}
+            return
+
+    response = await selection
+
+    message = response.choices[0].message
+
+    if not message.tool_calls:
+        # No tools triggered, return raw content
+        yield "token", message.content
+        yield "done", {"response": message.content}
+        return
+
+    # Tell the user what is being searched before the (slow) searches start. Off the loop:
+    # an unusual date can still need dateparser.
+    confirm_msg = "\n".join(filter(None, await asyncio.gather(*[
+        asyncio.to_thread(tool_confirmation, tool_call) for tool_call in message.tool_calls
+    ])))
+    if confirm_msg:
+        yield "confirm", confirm_msg
+
+    # Dispatch every tool call the model returned, not just the first
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_TOOLS)
+    outcomes = await asyncio.gather(*[
+        run_tool_call(tool_call, semaphore, user_location, last_known_city)
+        for tool_call in message.tool_calls
+    ])
+
+    errors = [error for _, _, error in outcomes if error]
+    if len(errors) == len(outcomes):
+        yield "done", {"response": "\n\n".join(errors)}
+        return
+
+    city = None
+    tool_messages = []
+    tool_results = []
+    for tool_call, (tool_output, result, error) in zip(message.tool_calls, outcomes):
+        func_name = tool_call.function.name
+        if error:
+            tool_output = {"error": error}
+        if func_name == "recommend_tours" and result.get("city"):
+            city = result["city"]
+        tool_results.append({"name": func_name, "output": tool_output})
+        tool_messages.append({
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "name": func_name,
+            "content": serialize_tool_output(func_name, tool_output)
+        })
+
+    yield "tool_results", tool_results
+
+    # One follow-up completion with all tool results, streamed token by token
+    parts = []
+    with span("llm", "followup"):
+        stream = await complete(
+            "followup",
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": "You are a helpful travel assistant."},
+                *chat_history,
+                {"role": "user", "content": user_input},
+                message,
+                *tool_messages
+            ],
+            stream=True,
+            stream_options={"include_usage": True}
+        )
 
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                record_usage("gpt-4o", chunk.usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield "token", delta
+
+    final = f"{confirm_msg}\n\n{''.join(parts)}"
+
+    yield "done", {
+        "response": final,
+        "city": city
+    }
+
+
+async def session_events(payload):
+    # Clients send {"conversationId", "message", "location"}; history and the last
+    # city are kept server-side. A request carrying "history" and no ID still works.
+    # One deadline for the whole turn; LLM, tool and Amadeus calls all draw from it
+    set_deadline(REQUEST_DEADLINE)
+
+    conversation_id = payload.get("conversationId")
+    session = session_store.get(conversation_id) if conversation_id else None
+    # Only a stored conversation keeps a summary; a client that sends its own history with no
+    # ID gets a fresh session every turn, so its history is passed through as is
+    stored = session is not None
+    if session is None:
+        conversation_id = conversation_id or new_conversation_id()
+        session = new_session()
+
+    if payload.get("location"):
+        session["location"] = payload["location"]
+
+    history = payload["history"] if "history" in payload else session["history"]
+    turn = {
+        "message": payload.get("message", ""),
+        "history": history,
+        "session": session if stored else None,
+        "location": session["location"],
+        "lastKnownCity": payload.get("lastKnownCity") or session["lastKnownCity"],
+    }
+
+    async for event, data in chat_events(turn):
+        if event == "done":
+            session["history"].append({"role": "user", "content": turn["message"].strip()})
+            session["history"].append({"role": "assistant", "content": data["response"]})
+            if data.get("city"):
+                session["lastKnownCity"] = data["city"]
+            session_store.save(conversation_id, session)
+            if stored and session.get("summary", {}).get("pending"):
+                refresh_in_background(conversation_id, session, history)
+            data = {**data, "conversationId": conversation_id}
+        yield event, data
+
+
+_background_tasks = set()
+
+
+def refresh_in_background(conversation_id, session, history):
+    # The rolling summary is brought up to date after the reply, off the turn's critical
+    # path; the next turn picks it up from the session
+    started = dict(session["summary"])
+
+    async def refresh():
+        set_deadline(LLM_TIMEOUTS["summarize"])
+        try:
+            updated = await refresh_summary(complete, history, started)
+        except Exception as e:
+            # Keep the old summary; the next long-enough turn tries again
+            print("[DEBUG] history summary failed:", e)
+            return
+        if updated is None:
+            return
+
+        # Another turn may have been saved meanwhile (SQLite store: a different copy), so
+        # only the summary is written back, onto the session as it is stored now
+        current = session_store.get(conversation_id)
+        if current is None:
+            return
+        summary = current.get("summary", {})
+        if summary.get("upto", 0) != started["upto"] or len(current["history"]) < updated["upto"]:
+            print("[DEBUG] session changed during summary refresh, dropping it")
+            return
+        if summary.get("pending", 0) > updated["upto"]:
+            updated["pending"] = summary["pending"]
+        current["summary"] = updated
+        session_store.save(conversation_id, current)
+
+    task = asyncio.create_task(refresh())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def collect_chat(payload, timings=None):
+    if timings is not None:
+        # Set inside the task so every child task and worker thread records into it
+        start_request_timing(timings)
+    async for event, data in session_events(payload):
+        if event == "done":
+            return data
+    return {"response": "There was an error. Please try again."}
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def busy_response():
+    response = jsonify({"response": BUSY_REPLY})
+    response.status_code = 503
+    response.headers["Retry-After"] = BUSY_RETRY_AFTER
+    return response
 
 
 def create_app():
@@ -64,128 +483,84 @@ def create_app():
 
     @app.route("/chat", methods=["POST"])
     def chat():
-        user_input = request.json.get("message", "").strip()
-        chat_history = request.json.get("history", [])
-        user_location = request.json.get("location")
-        last_known_city = request.json.get("lastKnownCity")
-
-        if is_greeting(user_input):
-            return jsonify({
-                "response": "Hi! How can I assist you with your travel plans today?"
-            })
-        
-        # ✳️ Guardrail: Check if input is travel-related
-        classification_prompt = f"""
-        Classify the following message. Is the user asking about travel (flights, hotels, destinations, tours, budget, cities, dates)? 
-        Answer only 'yes' or 'no'.
-
-        Message: \"{user_input}\"
-        """
-
-        classification_response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a classifier that answers with only 'yes' or 'no'."},
-                {"role": "user", "content": classification_prompt}
-            ]
+        if not admission.acquire():
+            return busy_response()
+        timings = {}
+        try:
+            with span("request", "chat"):
+                result = run_sync(collect_chat(request.json or {}, timings))
+        except UpstreamUnavailable as e:
+            print("[DEBUG] upstream unavailable:", e)
+            response = jsonify({"response": UNAVAILABLE_REPLY})
+            response.status_code = 503
+            response.headers["Retry-After"] = "10"
+            return response
+        finally:
+            admission.release()
+        response = jsonify(result)
+        # Per-request breakdown on demand (X-Timing: 1) or always with TIMING_HEADER=1
+        if request.headers.get("X-Timing") or os.getenv("TIMING_HEADER") == "1":
+            response.headers["Server-Timing"] = server_timing_header(timings)
+        return response
+
+    @app.route("/chat/stream", methods=["POST"])
+    def chat_stream():
+        payload = request.json or {}
+        if not admission.acquire():
+            return busy_response()
+
+        def generate():
+            try:
+                with span("request", "chat_stream"):
+                    for event, data in iter_sync(session_events(payload)):
+                        yield sse(event, data)
+            except Exception as e:
+                print("[DEBUG] stream failed:", e)
+                yield sse("error", {"response": "There was an error. Please try again."})
+
+        response = Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
         )
+        # The slot is held until the stream finishes or the client goes away
+        response.call_on_close(admission.release)
+        return response
+
+    @app.route("/router/stats", methods=["GET"])
+    def router_stats():
+        return jsonify(get_router().stats())
+
+    @app.route("/cache/stats", methods=["GET"])
+    def cache_stats():
+        return jsonify({
+            "locations": location_cache.stats(),
+            "shopping": shopping_cache.stats(),
+            "routes": route_cache.stats()
+        })
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
 
-        is_travel_related = classification_response.choices[0].message.content.strip().lower()
-
-        if is_travel_related != "yes":
-            return jsonify({
-                "response": "I'm a travel planner here to help with your travel plans. Could you please rephrase your question in that context?"
-            })
-
-        # Build conversation history
-        messages = [{"role": "system", "content": "You are a helpful travel assistant."}]
-        messages.extend(chat_history)
-        messages.append({"role": "user", "content": user_input})
-
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            tools=tools,
-            tool_choice="auto"
-        )
+    return app
 
-        message = response.choices[0].message
-
-        if message.tool_calls:
-            tool_call = message.tool_calls[0]
-            func_name = tool_call.function.name
-            args = eval(tool_call.function.arguments)
-
-            if func_name == "search_flights":
-                print(f"[DEBUG] Calling {func_name} with arguments:", args)
-                required = ['origin', 'destination', 'departure_date']
-                if not all(arg in args and args[arg] for arg in required):
-                    return jsonify({"response": "Missing required flight search parameters."})
-
-                result = search_flights(**args)
-
-                if "error" in result:
-                    return jsonify({"response": result["error"]})
-
-                confirm_msg = result.get("confirm_msg", "")
-                tool_output = {"flights": result.get("flights", [])}
-
-
-            elif func_name == "search_hotels":
-                result = search_hotels(**args)
-                tool_output = result
-
-            elif func_name == "recommend_destinations":
-                result = recommend_destinations(**args)
-                tool_output = result
-
-            elif func_name == "calculate_travel_budget":
-                result = calculate_travel_budget(**args)
-                tool_output = result
-
-            elif func_name == "recommend_tours":
-                if "city" not in args or not args["city"]:
-                    if last_known_city:
-                        args["city"] = last_known_city
-                    elif user_location:
-                        args["user_location"] = user_location
-                result = recommend_tours(**args)
-                tool_output = {
-                    "activities": result.get("activities", []),
-                    "city": result.get("city")
-                }
-            else:
-                tool_output = {"error": "Unknown tool"}
-
-            # Follow-up response using tool result
-            followup = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a helpful travel assistant."},
-                    *chat_history,
-                    {"role": "user", "content": user_input},
-                    message,
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "name": func_name,
-                        "content": str(tool_output)
-                    }
-                ]
-            )
-
-            final = f"{confirm_msg}\n\n{followup.choices[0].message.content}"
-
-
-            return jsonify({
-                "response": final,
-                "city": result.get("city") if func_name == "recommend_tours" else None
-            })
 
+def _router_metrics():
+    stats = get_router().stats()
+    return {
+        "all": {"total": stats["total"], "escalation_rate": stats["escalation_rate"]},
+        **{decision: {"decisions": n} for decision, n in stats["decisions"].items()}
+    }
 
-        # No tools triggered, return raw content
-        return jsonify({"response": message.content})
 
-    return app
+register_collector("travel_cache", lambda: {
+    "locations": location_cache.stats(),
+    "shopping": shopping_cache.stats(),
+    "routes": route_cache.stats()
+})
+register_collector("travel_router", _router_metrics)
+register_collector("travel_breaker", breaker_stats)
+register_collector("travel_admission", lambda: {"chat": admission.stats()})
 
 app = create_app()
\ No newline at end of file
@@ -0,0 +1,204 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Local stand-ins for the OpenAI chat-completions API and the Amadeus REST API.
+# Both are served from one port; responses are replayed from fixtures/amadeus.json or
+# scripted from keywords in the last user message, with configurable latency and jitter.
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "amadeus.json")
+
+OFF_TOPIC_WORDS = re.compile(r"\b(joke|python|poem|recipe|homework|bitcoin)\b", re.IGNORECASE)
+
+TOOL_SCRIPTS = [
+    (re.compile(r"\bcheapest order\b", re.IGNORECASE), "plan_itinerary",
+     {"cities": ["Nairobi", "Cairo", "Rome", "Paris"], "start_date": "3 June", "budget": 2500}),
+    (re.compile(r"\bcheapest day\b", re.IGNORECASE), "search_fare_calendar",
+     {"origin": "Nairobi", "destination": "Paris", "start_date": "June"}),
+    (re.compile(r"\bflights?\b", re.IGNORECASE), "search_flights",
+     {"origin": "Nairobi", "destination": "Paris", "departure_date": "3 June"}),
+    (re.compile(r"\bhotels?\b.*\bfrom\b", re.IGNORECASE), "search_hotels",
+     {"city_code": "PAR", "checkin_date": "3 June", "checkout_date": "7 June"}),
+    (re.compile(r"\b(tours?|museum|cruises?)\b", re.IGNORECASE), "recommend_tours",
+     {"city": "Paris", "start_date": "3 June", "end_date": "7 June"}),
+]
+
+ANSWER = (
+    "Here are the best options I found. The cheapest choice is listed first, followed by "
+    "the fastest one, and I can book or refine any of them if you tell me what matters most."
+)
+
+
+class UpstreamConfig:
+    def __init__(self, latency_ms=300, jitter_ms=100, amadeus_latency_ms=250, token_ms=15, seed=7):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.amadeus_latency_ms = amadeus_latency_ms
+        self.token_ms = token_ms
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def delay(self, base_ms):
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        time.sleep(max(0.0, base_ms + jitter) / 1000.0)
+
+
+class FakeUpstreams(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        super().__init__((host, port), FakeUpstreamHandler)
+        self.config = config or UpstreamConfig()
+        with open(FIXTURES_PATH, encoding="utf-8") as f:
+            self.fixtures = json.load(f)
+        self.counts = {}
+        self._counts_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, kind):
+        with self._counts_lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def snapshot(self):
+        with self._counts_lock:
+            return dict(self.counts)
+
+    def reset(self):
+        with self._counts_lock:
+            self.counts.clear()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="fake-upstreams", daemon=True).start()
+        return self
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._read_body()
+        if path.endswith("/chat/completions"):
+            return self._chat_completion(json.loads(body or b"{}"))
+        if path.endswith("/security/oauth2/token"):
+            self.server.count("amadeus.token")
+            return self._send_json({"type": "amadeusOAuth2Token", "access_token": "bench-token",
+                                    "token_type": "Bearer", "expires_in": 1799, "state": "approved"})
+        self._send_json({"error": f"unknown path {path}"}, status=404)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        fixtures = self.server.fixtures
+        routes = [
+            ("/shopping/flight-offers", "amadeus.flight_offers", "flight_offers"),
+            ("/shopping/hotel-offers", "amadeus.hotel_offers", "hotel_offers"),
+            ("/shopping/activities", "amadeus.activities", "activities"),
+            ("/reference-data/locations/cities", "amadeus.cities", "cities"),
+            ("/reference-data/locations", "amadeus.locations", "locations"),
+        ]
+        for suffix, kind, fixture in routes:
+            if path.endswith(suffix):
+                self.server.count(kind)
+                self.server.config.delay(self.server.config.amadeus_latency_ms)
+                return self._send_json({"data": fixtures[fixture], "meta": {"count": len(fixtures[fixture])}})
+        self._send_json({"errors": [{"status": 404, "detail": f"unknown path {path}"}]}, status=404)
+
+    def _chat_completion(self, request):
+        config = self.server.config
+        model = request.get("model", "gpt-4o")
+        messages = request.get("messages", [])
+        last = messages[-1] if messages else {}
+        last_user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        system = messages[0].get("content", "") if messages else ""
+
+        tool_calls = None
+        if "classifier" in system:
+            kind = "openai.classify"
+            content = "no" if OFF_TOPIC_WORDS.search(last_user) else "yes"
+        elif "summarize" in system:
+            kind = "openai.summarize"
+            content = "The traveller is planning a trip from Nairobi to Paris in early June."
+        elif request.get("tools") and last.get("role") == "user":
+            kind = "openai.select"
+            content = None
+            tool_calls = [
+                {"id": f"call_{i}", "type": "function",
+                 "function": {"name": name, "arguments": json.dumps(args)}}
+                for i, (pattern, name, args) in enumerate(TOOL_SCRIPTS) if pattern.search(last_user)
+            ] or None
+            if not tool_calls:
+                content = "Could you tell me a bit more about your travel plans?"
+        else:
+            kind = "openai.followup"
+            content = ANSWER
+
+        self.server.count(kind)
+        config.delay(config.latency_ms)
+
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 4
+        completion_tokens = len((content or "").split())
+        if request.get("stream"):
+            return self._stream(model, content or "", prompt_tokens, completion_tokens)
+
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        self._send_json({
+            "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+    def _stream(self, model, content, prompt_tokens, completion_tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(payload):
+            data = f"data: {payload}\n\n".encode()
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            delta = word if i == 0 else " " + word
+            chunk(json.dumps({
+                "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model, "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+            }))
+            time.sleep(self.server.config.token_ms / 1000.0)
+        chunk(json.dumps({
+            "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }))
+        chunk("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
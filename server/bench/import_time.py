@@ -0,0 +1,84 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Startup-cost check for the server, e.g. before shipping a change that adds imports:
+#
+#   cd server && python bench/import_time.py --budget-ms 400
+#
+# Imports the app in a fresh interpreter under `python -X importtime`, prints the slowest
+# imports, and exits non-zero if the total is over budget or one of the heavy modules that
+# are meant to load lazily (on first use) was imported at startup.
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("openai", "httpx", "amadeus", "dateparser", "tiktoken", "requests")
+LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check the server's import time")
+    parser.add_argument("--module", default="app", help="module to import (default: app)")
+    parser.add_argument("--budget-ms", type=float, default=400)
+    parser.add_argument("--runs", type=int, default=3, help="the fastest run is compared to the budget")
+    parser.add_argument("--top", type=int, default=15)
+    return parser.parse_args()
+
+
+def measure(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVER_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), len(indent)))
+    total_ms = sum(self_us for _, self_us, _, _ in imports) / 1000
+    return total_ms, imports
+
+
+def direct_children(imports, module):
+    # -X importtime prints an import's children (one indent level deeper) right before it
+    positions = [i for i, entry in enumerate(imports) if entry[0] == module]
+    if not positions:
+        return []
+    level = imports[positions[-1]][3]
+    children = []
+    for entry in reversed(imports[:positions[-1]]):
+        if entry[3] <= level:
+            break
+        if entry[3] == level + 2:
+            children.append(entry)
+    return children
+
+
+def main():
+    args = parse_args()
+    runs = [measure(args.module) for _ in range(args.runs)]
+    total_ms, imports = min(runs, key=lambda run: run[0])
+
+    print(f"import {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    # Slowest direct imports of the module (including everything they pulled in)
+    slowest = sorted(direct_children(imports, args.module), key=lambda i: -i[2])[:args.top]
+    for name, _, cumulative_us, _ in slowest:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    eager = sorted({name.split(".")[0] for name, _, _, _ in imports} & set(LAZY_MODULES))
+    failed = False
+    if eager:
+        print(f"FAIL: imported at startup but meant to be lazy: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time {total_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
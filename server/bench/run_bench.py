@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Load/latency benchmark for the /chat hot path, run entirely against local stand-ins:
+#
+#   cd server && python bench/run_bench.py --conversations 200 --concurrency 16 --output bench.json
+#
+# The Flask app is driven in-process through its test client while bench/fake_upstreams.py
+# plays OpenAI and Amadeus. Results are printed (and optionally written) as JSON so runs
+# can be diffed.
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, SERVER_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_upstreams import FakeUpstreams, UpstreamConfig
+
+DEFAULT_MIX = "flight=0.35,hotel=0.2,tour=0.2,multi=0.1,offtopic=0.15"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark /chat against local fake upstreams")
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,... from bench/scenarios.json")
+    parser.add_argument("--latency-ms", type=float, default=300, help="OpenAI base latency")
+    parser.add_argument("--amadeus-latency-ms", type=float, default=250)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--token-ms", type=float, default=15, help="delay between streamed tokens")
+    parser.add_argument("--stream", action="store_true", help="use /chat/stream and record time to first event")
+    parser.add_argument("--cold", action="store_true", help="clear in-process caches before every conversation")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    return parser.parse_args()
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(p):
+        return round(ordered[min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))], 2)
+
+    return {
+        "p50": pick(50), "p95": pick(95), "p99": pick(99),
+        "mean": round(sum(ordered) / len(ordered), 2), "max": round(ordered[-1], 2),
+    }
+
+
+def parse_mix(mix, scenarios):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in scenarios:
+            raise SystemExit(f"Unknown scenario '{name}'. Available: {', '.join(scenarios)}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def read_sse_done(chunks):
+    # Returns (payload of the "done" event, seconds to the first chunk)
+    body = b"".join(chunks).decode()
+    for block in body.split("\n\n"):
+        lines = block.split("\n")
+        if lines and lines[0] == "event: done":
+            return json.loads(lines[1][len("data: "):])
+    return {}
+
+
+def run_conversation(app, name, turns, stream):
+    client = app.test_client()
+    conversation_id = None
+    samples = []
+    for message in turns:
+        payload = {"message": message, "conversationId": conversation_id}
+        start = time.perf_counter()
+        first_byte = None
+        response = None
+        try:
+            if stream:
+                response = client.post("/chat/stream", json=payload, buffered=False)
+                chunks = []
+                for chunk in response.response:
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - start
+                    chunks.append(chunk if isinstance(chunk, bytes) else chunk.encode())
+                data = read_sse_done(chunks)
+            else:
+                response = client.post("/chat", json=payload)
+                data = response.get_json() or {}
+            ok = response.status_code == 200 and "response" in data
+        except Exception as e:
+            print(f"[bench] {name} turn failed:", e, file=sys.stderr)
+            data, ok = {}, False
+        finally:
+            # Runs the response's close callbacks, which give back the admission slot
+            # (a real WSGI server does this once the body has been sent)
+            if response is not None:
+                response.close()
+        elapsed = time.perf_counter() - start
+        conversation_id = data.get("conversationId", conversation_id)
+        samples.append({
+            "scenario": name,
+            "ok": ok,
+            "latency_ms": elapsed * 1000,
+            "ttfb_ms": first_byte * 1000 if first_byte is not None else None,
+        })
+    return samples
+
+
+def main():
+    args = parse_args()
+
+    with open(os.path.join(BENCH_DIR, "scenarios.json"), encoding="utf-8") as f:
+        scenarios = json.load(f)
+    weights = parse_mix(args.mix, scenarios)
+
+    upstreams = FakeUpstreams(UpstreamConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        amadeus_latency_ms=args.amadeus_latency_ms,
+        token_ms=args.token_ms,
+        seed=args.seed
+    )).start()
+    host, port = upstreams.server_address[:2]
+
+    # Must be set before the app modules build their clients
+    os.environ.update({
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{upstreams.base_url}/v1",
+        "AMADEUS_API_KEY": "bench",
+        "AMADEUS_API_SECRET": "bench",
+        "AMADEUS_HOST": host,
+        "AMADEUS_PORT": str(port),
+        "AMADEUS_SSL": "false",
+    })
+
+    import app as app_module
+    from utils.cache import location_cache, shopping_cache, route_cache
+
+    app = app_module.create_app()
+    rng = random.Random(args.seed)
+    plan = rng.choices(list(weights), weights=list(weights.values()), k=args.conversations)
+    caches_lock = threading.Lock()
+
+    def job(name):
+        if args.cold:
+            with caches_lock:
+                location_cache.clear()
+                shopping_cache.clear()
+                route_cache.clear()
+        return run_conversation(app, name, scenarios[name], args.stream)
+
+    # Warm-up turn so one-time imports don't land in the measurements
+    run_conversation(app, "warmup", ["hi"], args.stream)
+    upstreams.reset()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        samples = [s for batch in pool.map(job, plan) for s in batch]
+    wall = time.perf_counter() - started
+
+    upstream_calls = upstreams.snapshot()
+    upstreams.shutdown()
+
+    turns = len(samples)
+    by_scenario = {}
+    for name in weights:
+        latencies = [s["latency_ms"] for s in samples if s["scenario"] == name]
+        if latencies:
+            by_scenario[name] = {"turns": len(latencies), "latency_ms": percentiles(latencies)}
+
+    report = {
+        "config": vars(args),
+        "conversations": args.conversations,
+        "turns": turns,
+        "errors": sum(1 for s in samples if not s["ok"]),
+        "wall_seconds": round(wall, 3),
+        "throughput_turns_per_s": round(turns / wall, 2) if wall else 0.0,
+        "latency_ms": percentiles([s["latency_ms"] for s in samples]),
+        "by_scenario": by_scenario,
+        "upstream_calls": upstream_calls,
+        "upstream_calls_per_turn": {
+            **{kind: round(n / turns, 3) for kind, n in sorted(upstream_calls.items())},
+            "total": round(sum(upstream_calls.values()) / turns, 3) if turns else 0.0,
+        },
+        "memory": {
+            # ru_maxrss is KiB on Linux; one process is one worker here
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+    }
+    if args.stream:
+        report["ttfb_ms"] = percentiles([s["ttfb_ms"] for s in samples if s["ttfb_ms"] is not None])
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import os
+
+# Production serving, from server/:
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# The app is imported and warmed once in the master (preload_app) and then forked, so every
+# worker starts with the gazetteer, router model, date parser and API clients loaded.
+# Workers are threaded; each runs its own event loop for the OpenAI calls.
+
+# Several processes must share conversations and upstream caches; both default to SQLite
+# files next to the app unless configured otherwise
+os.environ.setdefault("SESSION_BACKEND", "sqlite")
+os.environ.setdefault("CACHE_BACKEND", "sqlite")
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 2))
+# The app splits per-process limits (the Amadeus rate limiter) across the workers
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "gthread"
+preload_app = True
+
+# Admission control runs inside each worker (utils/admission.py). Threads cover the admitted
+# turns plus the admission queue plus a few spare, so requests over the limit still reach
+# the app and get a fast 503 instead of waiting unseen in gunicorn's own queue.
+threads = int(os.getenv("MAX_ACTIVE_REQUESTS", "16")) + int(os.getenv("ADMISSION_QUEUE", "32")) + 8
+worker_connections = threads * 2
+backlog = int(os.getenv("BACKLOG", "256"))
+
+# Streamed turns can take a while; the request deadline (REQUEST_DEADLINE) bounds them first
+timeout = int(os.getenv("WORKER_TIMEOUT", "90"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks can't build up
+max_requests = int(os.getenv("MAX_REQUESTS", "5000"))
+max_requests_jitter = 500
+
+accesslog = "-"
@@ -15,6 +15,45 @@ tools = [
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_fare_calendar",
+            "description": "Find the cheapest day to fly between two cities across a date range: a whole month (e.g. 'June'), a start and end date, or a date plus/minus a number of flexible days. Returns the cheapest fare per day.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "origin": {"type": "string"},
+                    "destination": {"type": "string"},
+                    "start_date": {"type": "string", "description": "First day of the window, or a month name to search that whole month"},
+                    "end_date": {"type": "string", "format": "date"},
+                    "flexibility_days": {"type": "integer", "minimum": 0, "description": "Search this many days before and after start_date"}
+                },
+                "required": ["origin", "destination", "start_date"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "plan_itinerary",
+            "description": "Plan a multi-city trip: find the cheapest (or fastest) order to visit several cities, with the flight for each leg and a budget breakdown.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "cities": {"type": "array", "items": {"type": "string"}, "description": "Cities to visit"},
+                    "start_date": {"type": "string", "format": "date"},
+                    "origin": {"type": "string", "description": "City the trip starts from; defaults to the first city"},
+                    "return_to_origin": {"type": "boolean"},
+                    "nights_per_city": {"type": "integer"},
+                    "end_date": {"type": "string", "format": "date", "description": "Latest date the trip may end"},
+                    "budget": {"type": "number", "description": "Total flight budget; with optimize=duration, the fastest order within it"},
+                    "optimize": {"type": "string", "enum": ["price", "duration"]}
+                },
+                "required": ["cities", "start_date"]
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -67,7 +106,7 @@ tools = [
         "type": "function",
         "function": {
             "name": "recommend_tours",
-            "description": "Recommend tours based on city, category, and dates. Will auto-detect city from user location if city is missing.",
+            "description": "Recommend tours based on city, category, and dates. Will auto-detect city from user location if city is missing. Use page to show more results for the same search.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -81,7 +120,9 @@ tools = [
                             "latitude": {"type": "number"},
                             "longitude": {"type": "number"}
                         }
-                    }
+                    },
+                    "page": {"type": "integer", "minimum": 1},
+                    "page_size": {"type": "integer", "minimum": 1, "maximum": 10}
                 },
                 "required": ["start_date", "end_date"]
             }
@@ -0,0 +1,216 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+
+# Local search over the Amadeus activities around a place. Activities are fetched once per
+# geohash cell (see recommend_tours), parsed into compact records and indexed here, so
+# questions about different categories in the same city are answered without upstream
+# calls. Ranking is BM25 over name and description, with category synonyms expanded.
+GEOHASH_PRECISION = 5           # ~5 km cells
+ACTIVITY_RADIUS_KM = 5          # fetch radius around the cell centre, covers the cell
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(minute|min|hour|hr|day)s?")
+_DURATION_MINUTES = {"minute": 1, "min": 1, "hour": 60, "hr": 60, "day": 1440}
+
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "in", "on", "at", "to", "for", "with", "by", "from", "or",
+    "your", "our", "its", "is", "are", "this", "that", "tour", "tours", "activity", "activities",
+}
+
+# Category words and what they should also match. Multi-word entries match as phrases.
+CATEGORY_SYNONYMS = [
+    {"museum", "gallery", "art", "exhibition", "painting", "sculpture", "louvre", "orsay"},
+    {"safari", "game drive", "wildlife", "game reserve", "national park", "animal"},
+    {"cruise", "boat", "river", "sailing", "yacht", "ferry"},
+    {"food", "culinary", "cooking", "tasting", "dinner", "lunch", "restaurant", "market"},
+    {"wine", "vineyard", "winery", "tasting"},
+    {"walking", "walk", "stroll", "neighbourhood", "neighborhood"},
+    {"history", "historic", "historical", "heritage", "castle", "palace", "ruins", "monument"},
+    {"day trip", "excursion", "outing"},
+    {"nightlife", "night", "bar", "pub", "club", "cabaret"},
+    {"adventure", "hiking", "hike", "climbing", "kayak", "rafting", "zipline", "diving"},
+    {"beach", "snorkel", "snorkeling", "island", "coast"},
+    {"family", "kids", "children", "zoo", "aquarium", "theme park"},
+    {"show", "concert", "theatre", "theater", "opera", "performance"},
+    {"religious", "church", "cathedral", "mosque", "temple", "basilica"},
+]
+SYNONYM_WEIGHT = 0.6
+
+
+def geohash(lat, lon, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    code, bits, value, even = [], 0, 0, True
+    while len(code) < precision:
+        span = lon_range if even else lat_range
+        target = lon if even else lat
+        mid = (span[0] + span[1]) / 2
+        value <<= 1
+        if target >= mid:
+            value |= 1
+            span[0] = mid
+        else:
+            span[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            code.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(code)
+
+
+def geohash_center(code):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in code:
+        value = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            span = lon_range if even else lat_range
+            mid = (span[0] + span[1]) / 2
+            if value >> shift & 1:
+                span[0] = mid
+            else:
+                span[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+def _stem(token):
+    # Just enough to fold plurals: galleries -> gallery, museums -> museum
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    # Unigrams plus adjacent-word bigrams ("game drive"), accents folded ("Musée" -> "musee")
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+    words = [_stem(t) for t in _TOKEN_RE.findall(text) if t not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _phrase(text):
+    # Same normalization as tokenize, so a synonym can only be a term the index can hold
+    return " ".join(_stem(t) for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS)
+
+
+def _build_synonyms():
+    synonyms = {}
+    for group in CATEGORY_SYNONYMS:
+        terms = {_phrase(term) for term in group} - {""}
+        for term in terms:
+            synonyms.setdefault(term, set()).update(terms - {term})
+    return synonyms
+
+
+_SYNONYMS = _build_synonyms()
+
+
+def parse_duration_minutes(value):
+    # Amadeus gives e.g. "2 hours", "30 minutes" or "1 day"
+    match = _DURATION_RE.search((value or "").lower())
+    if not match:
+        return None
+    return int(float(match.group(1)) * _DURATION_MINUTES[match.group(2)])
+
+
+class Activity:
+    __slots__ = ("name", "description", "price", "currency", "booking_link", "rating", "duration")
+
+    def __init__(self, name, description, price, currency, booking_link, rating, duration):
+        self.name = name
+        self.description = description
+        self.price = price
+        self.currency = currency
+        self.booking_link = booking_link
+        self.rating = rating
+        self.duration = duration
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "shortDescription": self.description or "No description",
+            "price": self.price,
+            "currency": self.currency,
+            "bookingLink": self.booking_link
+        }
+
+
+def parse_activities(data):
+    activities = []
+    for item in data or []:
+        try:
+            price = item.get("price") or {}
+            rating = item.get("rating")
+            activities.append(Activity(
+                item["name"],
+                item.get("shortDescription") or "",
+                price.get("amount"),
+                price.get("currencyCode"),
+                item.get("bookingLink"),
+                float(rating) if rating else None,
+                parse_duration_minutes(item.get("minimumDuration"))
+            ))
+        except (KeyError, TypeError, ValueError) as e:
+            print("[DEBUG] skipping malformed activity:", e)
+    return activities
+
+
+class ActivityIndex:
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, activities):
+        self.activities = activities
+        self.postings = {}      # term -> [(activity position, term frequency)]
+        self.lengths = []
+        for position, activity in enumerate(activities):
+            # The name says what the activity is, so it counts twice
+            terms = tokenize(activity.name) * 2 + tokenize(activity.description)
+            self.lengths.append(len(terms))
+            for term, count in Counter(terms).items():
+                self.postings.setdefault(term, []).append((position, count))
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def _query_terms(self, query):
+        weights = {}
+        for term in tokenize(query):
+            weights[term] = 1.0
+        for term in list(weights):
+            for synonym in _SYNONYMS.get(term, ()):
+                weights.setdefault(synonym, SYNONYM_WEIGHT)
+        return weights
+
+    def _scores(self, terms):
+        scores = {}
+        total = len(self.activities)
+        for term, weight in terms.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, tf in postings:
+                norm = 1 - self.B + self.B * self.lengths[position] / self.average_length
+                scores[position] = scores.get(position, 0.0) + weight * idf * tf * (self.K1 + 1) / (tf + self.K1 * norm)
+        return scores
+
+    def search(self, query=None, max_minutes=None, offset=0, limit=5):
+        # Returns (number of matches, activities on the requested page)
+        terms = self._query_terms(query)
+        if terms:
+            ranked = sorted(self._scores(terms).items(), key=lambda item: -item[1])
+            positions = [position for position, _ in ranked]
+        else:
+            # No category (or just "tours"): best rated first, otherwise in the order Amadeus returned them
+            positions = sorted(range(len(self.activities)), key=lambda p: -(self.activities[p].rating or 0))
+
+        if max_minutes is not None:
+            positions = [
+                p for p in positions
+                if self.activities[p].duration is None or self.activities[p].duration <= max_minutes
+            ]
+        return len(positions), [self.activities[p] for p in positions[offset:offset + limit]]
@@ -0,0 +1,67 @@
+import os
+import threading
+
+# Per-process admission control for the chat endpoints: at most max_active turns run at
+# once, at most max_queue more wait (up to max_wait seconds) for a slot, and anything
+# beyond that is turned away immediately with a 503 so a burst cannot pile up unbounded
+# latency behind the upstream APIs.
+
+
+class AdmissionController:
+    def __init__(self, max_active, max_queue, max_wait):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_active)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def acquire(self):
+        admitted = self._slots.acquire(blocking=False)
+        if not admitted:
+            with self._lock:
+                if self.waiting >= self.max_queue:
+                    self.rejected += 1
+                    return False
+                self.waiting += 1
+            try:
+                admitted = self._slots.acquire(timeout=self.max_wait)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+
+        with self._lock:
+            if admitted:
+                self.active += 1
+                self.admitted += 1
+            else:
+                self.rejected += 1
+        return admitted
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": self.active,
+                "waiting": self.waiting,
+                "max_active": self.max_active,
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
+
+
+def create_admission_controller():
+    # MAX_ACTIVE_REQUESTS / ADMISSION_QUEUE / ADMISSION_WAIT are per worker process
+    return AdmissionController(
+        max_active=int(os.getenv("MAX_ACTIVE_REQUESTS", "16")),
+        max_queue=int(os.getenv("ADMISSION_QUEUE", "32")),
+        max_wait=float(os.getenv("ADMISSION_WAIT", "5"))
+    )
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# One long-lived event loop shared by every request thread. Flask views stay
+# synchronous and hand their coroutines to it, so the async OpenAI client and its
+# connection pool always live on the same loop, and streaming responses can pull
+# items from an async generator one at a time.
+_loop = None
+_loop_lock = threading.Lock()
+
+# Blocking tool calls (asyncio.to_thread) run on the loop's own executor, sized for every
+# admitted turn running its tools at once. The asyncio default (cpu + 4 threads) lets one
+# slow upstream starve every other turn in the process.
+_executor_workers = min(32, (os.cpu_count() or 1) + 4)
+
+
+def set_executor_workers(workers):
+    # Call before the loop starts (at import time); a running loop keeps its executor
+    global _executor_workers
+    _executor_workers = max(1, int(workers))
+
+
+def _reset_after_fork():
+    # The loop's thread does not survive a fork; a worker starts its own on first use
+    global _loop, _loop_lock
+    _loop = None
+    _loop_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_loop():
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                loop.set_default_executor(
+                    ThreadPoolExecutor(max_workers=_executor_workers, thread_name_prefix="tool")
+                )
+                thread = threading.Thread(target=loop.run_forever, name="async-bridge", daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro, timeout=None):
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def iter_sync(agen):
+    # Drive an async generator from a plain (WSGI) generator. The whole generator runs
+    # inside one task, so context variables (deadline, timings) persist across items.
+    items = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put((item, None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            items.put((done, e))
+            return
+        items.put((done, None))
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_loop())
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # Client went away or we finished: stop the pipeline if it is still running
+        future.cancel()
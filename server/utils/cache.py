@@ -0,0 +1,307 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Sentinel so a cached None (negative result) can be told apart from a miss
+MISSING = object()
+
+
+def normalize_city(name):
+    # "  New   York " and "new york" should share one cache entry
+    if not isinstance(name, str):
+        return name
+    return " ".join(name.lower().split())
+
+
+def geo_key(lat, lon, precision=2):
+    # Round onto a grid (~1 km at 2 decimals) so nearby points share an entry
+    return round(float(lat), precision), round(float(lon), precision)
+
+
+class SharedCacheStore:
+    # Second cache tier in a local SQLite file, shared by every worker process on the host,
+    # so a lookup one worker paid for is a hit for all of them. Failures count as misses.
+    PURGE_EVERY = 500
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                "expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+        # A connection opened before a pre-fork server forks must not be used by the children
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace, key):
+        # (value, seconds of freshness left) or MISSING
+        try:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, repr(key))
+            ).fetchone()
+            if row is None:
+                return MISSING
+            left = row[1] - time.time()
+            return (pickle.loads(row[0]), left) if left > 0 else MISSING
+        except Exception as e:
+            print("[DEBUG] shared cache read failed:", e)
+            return MISSING
+
+    def set(self, namespace, key, value, ttl):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (namespace, repr(key), pickle.dumps(value), time.time() + ttl)
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        except Exception as e:
+            print("[DEBUG] shared cache write failed:", e)
+
+    def delete(self, namespace, key=MISSING):
+        try:
+            with self._connect() as conn:
+                if key is MISSING:
+                    conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+                else:
+                    conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, repr(key)))
+        except Exception as e:
+            print("[DEBUG] shared cache delete failed:", e)
+
+
+def create_shared_store():
+    # CACHE_BACKEND=sqlite (with CACHE_DB_PATH) shares caches between worker processes;
+    # the default keeps every cache in-process only
+    if os.getenv("CACHE_BACKEND", "memory").lower() == "sqlite":
+        return SharedCacheStore(os.getenv("CACHE_DB_PATH", "cache.db"))
+    return None
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=3600, shared=None, namespace=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self.namespace = namespace
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+
+    def get(self, key, default=MISSING):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+        if self.shared is not None:
+            found = self.shared.get(self.namespace, key)
+            if found is not MISSING:
+                value, left = found
+                self._store(key, value, left)
+                with self._lock:
+                    self.shared_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def _store(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self._store(key, value, ttl)
+        if self.shared is not None:
+            self.shared.set(self.namespace, key, value, ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(self.namespace, key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.shared_hits = 0
+        if self.shared is not None:
+            self.shared.delete(self.namespace)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_hits": self.shared_hits,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class SingleFlightCache:
+    # Cache for upstream responses: concurrent identical misses share one fetch, and an
+    # expired entry is still served for a while if the refresh is slow or failing
+    def __init__(self, maxsize=1024, stale_wait=1.5, shared=None, namespace=None):
+        self.maxsize = maxsize
+        self.stale_wait = stale_wait
+        self.shared = shared
+        self.namespace = namespace
+        self._data = OrderedDict()  # key -> (value, fresh_until, stale_until)
+        self._inflight = {}         # key -> Future of the fetch in progress
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.shared_hits = 0
+
+    def get_or_fetch(self, key, fetch, ttl, stale_ttl=0):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            stale = entry if entry is not None and entry[2] > now else None
+            if entry is not None and stale is None:
+                del self._data[key]
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                if stale is None:
+                    self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            if stale is None:
+                self._run(key, fetch, ttl, stale_ttl, future)
+            else:
+                threading.Thread(
+                    target=self._run, args=(key, fetch, ttl, stale_ttl, future), daemon=True
+                ).start()
+
+        if stale is None:
+            return future.result()
+
+        try:
+            return future.result(timeout=self.stale_wait)
+        except Exception:
+            with self._lock:
+                self.stale_served += 1
+            return stale[0]
+
+    def _run(self, key, fetch, ttl, stale_ttl, future):
+        try:
+            # Another worker process may already have fetched this; take its copy
+            # for whatever freshness it has left
+            found = MISSING if self.shared is None else self.shared.get(self.namespace, key)
+            if found is MISSING:
+                value = fetch()
+                if self.shared is not None:
+                    self.shared.set(self.namespace, key, value, ttl)
+            else:
+                value, ttl = found
+                with self._lock:
+                    self.shared_hits += 1
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (value, now + ttl, now + ttl + stale_ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.coalesced = self.stale_served = self.shared_hits = 0
+        if self.shared is not None:
+            self.shared.delete(self.namespace)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "stale_served": self.stale_served,
+                "shared_hits": self.shared_hits,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+shared_store = create_shared_store()
+
+# Shared cache for Amadeus reference-data lookups (IATA codes, coordinates, reverse geocoding)
+location_cache = TTLCache(maxsize=4096, ttl=24 * 3600, shared=shared_store, namespace="locations")
+
+# Empty answers are cached too, but for less time in case Amadeus adds the place later
+NEGATIVE_TTL = 15 * 60
+
+# Shared cache for Amadeus shopping responses (flight offers, hotel offers, activities)
+shopping_cache = SingleFlightCache(maxsize=2048, shared=shared_store, namespace="shopping")
+
+# Pairwise city cost matrix for plan_itinerary, one (price, duration) edge per
+# origin/destination/date, so adding a city to a plan only searches the new pairs
+route_cache = TTLCache(maxsize=8192, ttl=30 * 60, shared=shared_store, namespace="routes")
@@ -0,0 +1,175 @@
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+# Shared natural-language date resolution. Common formats are handled by a regex fast path;
+# dateparser (slow, especially on first use) is only the fallback, with English pinned so it
+# never runs language auto-detection.
+DATEPARSER_LANGUAGES = ["en"]
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+WEEKDAYS = {
+    "monday": 0, "mon": 0, "tuesday": 1, "tue": 1, "tues": 1, "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thur": 3, "thurs": 3, "friday": 4, "fri": 4,
+    "saturday": 5, "sat": 5, "sunday": 6, "sun": 6,
+}
+
+_MONTH = "(" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s+(\d{4}))?"
+
+ISO_RE = re.compile(r"^(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})(?:[t ][\d:.]+z?)?$")
+DAY_MONTH_RE = re.compile(rf"^(?:the\s+)?{_DAY}(?:\s+of)?\s+{_MONTH}{_YEAR}$")
+MONTH_DAY_RE = re.compile(rf"^{_MONTH}\s+(?:the\s+)?{_DAY}{_YEAR}$")
+MONTH_ONLY_RE = re.compile(rf"^(?:in\s+)?(?:early\s+)?{_MONTH}{_YEAR}$")
+WEEKDAY_RE = re.compile(r"^(?:(this|next|on)\s+)?(" + "|".join(WEEKDAYS) + r")$")
+IN_N_RE = re.compile(r"^in\s+(\d{1,3}|a|an|one|two|three)\s+(day|week)s?$")
+EXPLICIT_YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+
+_SMALL_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3}
+
+
+def normalize_date_text(raw_date):
+    return " ".join(str(raw_date).lower().replace(",", ", ").split()).replace(" ,", ",")
+
+
+def _safe_date(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _fast_path(text, today):
+    # Returns (date, has_explicit_year), or None when the text needs dateparser
+    if text == "today":
+        return today, True
+    if text == "tomorrow":
+        return today + timedelta(days=1), True
+    if text in ("day after tomorrow", "the day after tomorrow"):
+        return today + timedelta(days=2), True
+    if text == "next week":
+        return today + timedelta(days=7), True
+
+    m = ISO_RE.match(text)
+    if m:
+        return _safe_date(int(m.group(1)), int(m.group(2)), int(m.group(3))), True
+
+    m = DAY_MONTH_RE.match(text)
+    if m:
+        day, month, year = int(m.group(1)), MONTHS[m.group(2)], m.group(3)
+        return _safe_date(int(year) if year else today.year, month, day), bool(year)
+
+    m = MONTH_DAY_RE.match(text)
+    if m:
+        month, day, year = MONTHS[m.group(1)], int(m.group(2)), m.group(3)
+        return _safe_date(int(year) if year else today.year, month, day), bool(year)
+
+    m = MONTH_ONLY_RE.match(text)
+    if m:
+        # Same as dateparser's PREFER_DAY_OF_MONTH="first"
+        month, year = MONTHS[m.group(1)], m.group(2)
+        return date(int(year) if year else today.year, month, 1), bool(year)
+
+    m = WEEKDAY_RE.match(text)
+    if m:
+        # Upcoming occurrence, never today (as dateparser with PREFER_DATES_FROM="future")
+        ahead = (WEEKDAYS[m.group(2)] - today.weekday()) % 7 or 7
+        return today + timedelta(days=ahead), True
+
+    m = IN_N_RE.match(text)
+    if m:
+        n = _SMALL_NUMBERS.get(m.group(1)) or int(m.group(1))
+        return today + timedelta(days=n * (7 if m.group(2) == "week" else 1)), True
+
+    return None
+
+
+def _dateparser(raw_date, today):
+    from dateparser import parse as parse_date
+
+    parsed = parse_date(
+        raw_date,
+        languages=DATEPARSER_LANGUAGES,
+        settings={
+            "PREFER_DAY_OF_MONTH": "first",
+            "PREFER_DATES_FROM": "future",
+            "RELATIVE_BASE": datetime(today.year, today.month, today.day)
+        }
+    )
+    return parsed.date() if parsed else None
+
+
+@lru_cache(maxsize=4096)
+def _resolve(text, today):
+    # Handle "this year" or "next year" explicitly
+    if text == "this year":
+        return datetime(today.year, 1, 1), "ok"
+    if text == "next year":
+        return datetime(today.year + 1, 1, 1), "ok"
+
+    result = _fast_path(text, today)
+    if result is not None:
+        parsed, explicit_year = result
+    else:
+        parsed, explicit_year = _dateparser(text, today), bool(EXPLICIT_YEAR_RE.search(text))
+
+    if parsed is None:
+        return None, "unrecognized"
+
+    if not explicit_year:
+        # A partial date like "24th May" that already passed this year means next year
+        if (parsed.month, parsed.day) < (today.month, today.day):
+            parsed = _safe_date(today.year + 1, parsed.month, parsed.day) or parsed.replace(year=today.year + 1, day=28)
+        else:
+            parsed = parsed.replace(year=today.year)
+
+    if parsed < today:
+        return None, "past"
+
+    return datetime(parsed.year, parsed.month, parsed.day), "ok"
+
+
+def parse_and_validate_date(raw_date, today=None):
+    # Returns (datetime, "ok") or (None, "unrecognized" | "past"); memoized per (text, day)
+    if not raw_date or not str(raw_date).strip():
+        return None, "unrecognized"
+    today = today or date.today()
+    return _resolve(normalize_date_text(raw_date), today)
+
+
+def month_window(raw_date, today=None):
+    # A bare month ("October", "in june", "Dec 2027") -> (first day, last day) of it that are
+    # still ahead, so the current month means the rest of this month, not next year's.
+    # None for anything that is not a bare month, or a month that is already over.
+    today = today or date.today()
+    m = MONTH_ONLY_RE.match(normalize_date_text(raw_date or ""))
+    if not m:
+        return None
+    month, year = MONTHS[m.group(1)], m.group(2)
+    year = int(year) if year else (today.year if month >= today.month else today.year + 1)
+    first = date(year, month, 1)
+    last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    if last < today:
+        return None
+    return max(first, today), last
+
+
+def resolve_dates(raw_dates, today=None):
+    # Resolve several dates in one pass against the same "today"
+    today = today or date.today()
+    return [parse_and_validate_date(raw, today) for raw in raw_dates]
+
+
+def resolve_date_range(raw_start, raw_end, today=None):
+    # Check-in/check-out, start/end: "28 Dec" to "3 Jan" rolls the end into the next year
+    (start, start_status), (end, end_status) = resolve_dates([raw_start, raw_end], today)
+    if start and end and end < start and not EXPLICIT_YEAR_RE.search(str(raw_end)):
+        end = _safe_date(end.year + 1, end.month, end.day)
+        end = datetime(end.year, end.month, end.day) if end else None
+    return (start, start_status), (end, end_status)
@@ -0,0 +1,176 @@
+import csv
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict, namedtuple
+from difflib import SequenceMatcher
+
+# Bundled offline index of major cities/airports so common lookups never touch Amadeus
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "gazetteer.csv")
+
+Place = namedtuple("Place", ["iata", "city", "country", "lat", "lon"])
+
+FUZZY_MIN_RATIO = 0.8
+SHORT_NAME_CHARS = 6
+GRID_DEG = 1.0
+EARTH_RADIUS_KM = 6371.0
+
+
+def normalize_name(name):
+    # "Jo'burg", "São Paulo " and "sao  paulo" all become "joburg" / "sao paulo"
+    if not isinstance(name, str):
+        return ""
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.lower().replace("'", "").replace("’", "")
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return " ".join(text.split())
+
+
+def _edit_distance(a, b, limit):
+    # Levenshtein distance, giving up (returns limit + 1) once it must exceed limit
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _cell(lat, lon):
+    return int(math.floor(lat / GRID_DEG)), int(math.floor(lon / GRID_DEG))
+
+
+class Gazetteer:
+    def __init__(self, places, aliases):
+        self.places = places
+        self._names = {}                   # normalized name/alias -> Place
+        self._codes = {}                   # lowercase IATA code -> Place
+        self._trigrams = defaultdict(set)  # trigram -> normalized names
+        self._grid = defaultdict(list)     # (lat cell, lon cell) -> Places
+
+        for place, place_aliases in zip(places, aliases):
+            self._codes[place.iata.lower()] = place
+            for name in [place.city, *place_aliases]:
+                key = normalize_name(name)
+                if not key or key in self._names:
+                    continue
+                self._names[key] = place
+                for gram in _trigrams(key):
+                    self._trigrams[gram].add(key)
+            self._grid[_cell(place.lat, place.lon)].append(place)
+
+    @classmethod
+    def from_csv(cls, path=GAZETTEER_PATH):
+        places, aliases = [], []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                places.append(Place(
+                    iata=row["iata"].upper(),
+                    city=row["city"],
+                    country=row["country"],
+                    lat=float(row["lat"]),
+                    lon=float(row["lon"])
+                ))
+                aliases.append([a for a in row.get("aliases", "").split("|") if a])
+        return cls(places, aliases)
+
+    def has_name(self, name):
+        # Exact name/alias check only, no fuzzy matching
+        return normalize_name(name) in self._names
+
+    def lookup(self, name):
+        key = normalize_name(name)
+        if not key:
+            return None
+
+        place = self._names.get(key) or self._codes.get(key)
+        if place:
+            return place
+
+        # "Nairobi, Kenya" -> "Nairobi"
+        if "," in name:
+            head = normalize_name(name.split(",", 1)[0])
+            place = self._names.get(head)
+            if place:
+                return place
+
+        return None
+
+    def fuzzy_lookup(self, name):
+        # Typo tolerance ("Nairobbi", "Pariss"). Only used once Amadeus has no answer: a real
+        # city one or two letters off a bundled one ("Bern", "Dhaka") must not be rewritten.
+        key = normalize_name(name)
+        # Too short to tell a typo from a different place
+        if len(key) < 4:
+            return None
+
+        counts = defaultdict(int)
+        for gram in _trigrams(key):
+            for candidate in self._trigrams.get(gram, ()):
+                counts[candidate] += 1
+        if not counts:
+            return None
+
+        best_name, best_ratio = None, 0.0
+        for candidate, _ in sorted(counts.items(), key=lambda kv: -kv[1])[:3]:
+            # Typos rarely hit the first letter; short names get at most one edit
+            if candidate[0] != key[0]:
+                continue
+            if len(key) <= SHORT_NAME_CHARS and _edit_distance(key, candidate, 1) > 1:
+                continue
+            ratio = SequenceMatcher(None, key, candidate).ratio()
+            if ratio > best_ratio:
+                best_name, best_ratio = candidate, ratio
+
+        if best_ratio < FUZZY_MIN_RATIO:
+            return None
+        return self._names[best_name]
+
+    def nearest(self, lat, lon, max_km=75):
+        lat, lon = float(lat), float(lon)
+        row, col = _cell(lat, lon)
+        # Cells are ~111 km tall; search enough rings to cover max_km
+        rings = int(math.ceil(max_km / (111.0 * GRID_DEG))) + 1
+
+        best, best_km = None, max_km
+        for dr in range(-rings, rings + 1):
+            for dc in range(-rings, rings + 1):
+                for place in self._grid.get((row + dr, col + dc), ()):
+                    km = haversine_km(lat, lon, place.lat, place.lon)
+                    if km <= best_km:
+                        best, best_km = place, km
+        return best
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer.from_csv()
+    return _gazetteer
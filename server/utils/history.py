@@ -0,0 +1,117 @@
+import json
+
+# Keeps the prompt flat for long sessions: recent turns verbatim, older turns folded into a
+# rolling summary that is stored on the session and only extended with newly evicted messages.
+KEEP_RECENT_MESSAGES = 8        # last 4 user/assistant turns
+HISTORY_TOKEN_BUDGET = 3000     # for the verbatim part of the history
+STALE_MESSAGE_CHARS = 1200      # older assistant/tool payloads are cut to this size
+SUMMARY_BATCH_MESSAGES = 4      # fold evicted messages in batches, not one summary call per turn
+SUMMARY_MODEL = "gpt-4o-mini"
+
+_encoding = None
+
+
+def _get_encoding():
+    # tiktoken is optional; without it fall back to the ~4 chars per token rule of thumb
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    return _encoding
+
+
+def _content_text(message):
+    content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+    if content is None:
+        return ""
+    return content if isinstance(content, str) else json.dumps(content, default=str)
+
+
+def count_text_tokens(text):
+    encoding = _get_encoding()
+    return len(encoding.encode(text)) if encoding else len(text) // 4
+
+
+def count_tokens(messages):
+    return sum(4 + count_text_tokens(_content_text(message)) for message in messages)
+
+
+def _trim_stale(message):
+    if message.get("role") == "tool":
+        return None
+    text = _content_text(message)
+    if message.get("role") == "assistant" and len(text) > STALE_MESSAGE_CHARS:
+        return {**message, "content": text[:STALE_MESSAGE_CHARS] + " …[truncated]"}
+    return message
+
+
+async def _summarize(complete, previous_summary, messages):
+    transcript = "\n".join(
+        f"{m.get('role')}: {_content_text(m)[:STALE_MESSAGE_CHARS]}"
+        for m in messages if m.get("role") in ("user", "assistant")
+    )
+    prompt = (
+        "Update the running summary of a travel-planning conversation. Keep cities, dates, "
+        "budgets, traveller preferences and any decisions made. Be brief.\n\n"
+        f"Current summary:\n{previous_summary or '(none)'}\n\n"
+        f"New messages:\n{transcript}"
+    )
+    # complete() is app.complete, passed in: deadline, circuit breaker, timing and usage
+    response = await complete(
+        "summarize",
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": "You summarize conversations concisely."},
+            {"role": "user", "content": prompt}
+        ]
+    )
+    return response.choices[0].message.content.strip()
+
+
+def _summary(session, history):
+    # session["summary"] = {"text": str, "upto": int}: how many history messages the summary covers
+    summary = session.setdefault("summary", {"text": "", "upto": 0})
+    if summary["upto"] > len(history):
+        summary.update(text="", upto=0)
+    return summary
+
+
+def compact_history(history, session):
+    # No LLM call here: the turn uses whatever summary is cached. If older messages are due to
+    # be folded in, the cut is recorded and refresh_summary does it after the reply.
+    summary = _summary(session, history)
+
+    # Everything past the summary stays verbatim until refresh_summary has folded it in
+    due = max(len(history) - KEEP_RECENT_MESSAGES, 0)
+    if due - summary["upto"] >= SUMMARY_BATCH_MESSAGES:
+        summary["pending"] = due
+
+    # Unless it does not fit: then the oldest messages are dropped for this request only
+    cut = summary["upto"]
+    while len(history) - cut > 2 and count_tokens(history[cut:]) > HISTORY_TOKEN_BUDGET:
+        cut += 1
+    if cut > summary["upto"]:
+        summary["pending"] = max(summary.get("pending", 0), cut)
+
+    recent = history[cut:]
+    compacted = [m for m in (_trim_stale(m) for m in recent[:-2]) if m] + recent[-2:]
+
+    if summary["text"]:
+        compacted.insert(0, {
+            "role": "system",
+            "content": f"Summary of the earlier conversation: {summary['text']}"
+        })
+    return compacted
+
+
+async def refresh_summary(complete, history, summary):
+    # The summary extended over the range compact_history marked as pending, or None when
+    # nothing is due. The caller decides whether it still applies to the stored session.
+    cut = min(summary.get("pending", 0), len(history))
+    if cut <= summary["upto"]:
+        return None
+    text = await _summarize(complete, summary["text"], history[summary["upto"]:cut])
+    return {"text": text, "upto": cut}
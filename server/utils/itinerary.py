@@ -0,0 +1,171 @@
+# Ordering solver for plan_itinerary. Node 0 is the fixed starting city; matrix[a][b] is
+# the cost of flying a -> b (inf when there is no flight). Small trips are solved exactly
+# with Held-Karp dynamic programming, larger ones with nearest neighbour plus 2-opt.
+# An optional limit (a second cost matrix and a cap on its total, e.g. fares and the budget)
+# restricts the search to routes within it.
+INF = float("inf")
+DP_MAX_STOPS = 8
+
+
+def route_cost(matrix, route, closed=False):
+    cost = sum(matrix[a][b] for a, b in zip(route, route[1:]))
+    return cost + matrix[route[-1]][route[0]] if closed else cost
+
+
+def _held_karp(matrix, closed):
+    n = len(matrix) - 1
+    full = (1 << n) - 1
+    # cost[mask][last]: cheapest path from node 0 through the stops in mask, ending at stop last
+    cost = [[INF] * n for _ in range(1 << n)]
+    parent = [[-1] * n for _ in range(1 << n)]
+    for i in range(n):
+        cost[1 << i][i] = matrix[0][i + 1]
+
+    for mask in range(1, full + 1):
+        row = cost[mask]
+        for last in range(n):
+            base = row[last]
+            if base == INF:
+                continue
+            edges = matrix[last + 1]
+            for nxt in range(n):
+                bit = 1 << nxt
+                if mask & bit:
+                    continue
+                candidate = base + edges[nxt + 1]
+                if candidate < cost[mask | bit][nxt]:
+                    cost[mask | bit][nxt] = candidate
+                    parent[mask | bit][nxt] = last
+
+    best, best_last = INF, -1
+    for last in range(n):
+        total = cost[full][last] + (matrix[last + 1][0] if closed else 0)
+        if total < best:
+            best, best_last = total, last
+    if best_last < 0:
+        return None, INF
+
+    order, mask, last = [], full, best_last
+    while last >= 0:
+        order.append(last + 1)
+        mask, last = mask ^ (1 << last), parent[mask][last]
+    return [0] + order[::-1], best
+
+
+def _held_karp_limited(matrix, closed, limit_matrix, limit):
+    # Held-Karp keeping, per (stops visited, last stop), every path not beaten on both cost
+    # and limit total; paths over the limit are dropped as soon as they exceed it
+    n = len(matrix) - 1
+    full = (1 << n) - 1
+    # labels[(mask, last)]: [(cost, limit total, previous label, node)]
+    labels = {}
+
+    def add(key, label):
+        current = labels.setdefault(key, [])
+        if any(c <= label[0] and t <= label[1] for c, t, _, _ in current):
+            return
+        current[:] = [other for other in current if not (label[0] <= other[0] and label[1] <= other[1])]
+        current.append(label)
+
+    for i in range(n):
+        cost, total = matrix[0][i + 1], limit_matrix[0][i + 1]
+        if cost < INF and total <= limit:
+            add((1 << i, i), (cost, total, None, i + 1))
+
+    for mask in range(1, full + 1):
+        for last in range(n):
+            for label in labels.get((mask, last), ()):
+                for nxt in range(n):
+                    bit = 1 << nxt
+                    if mask & bit:
+                        continue
+                    cost = label[0] + matrix[last + 1][nxt + 1]
+                    total = label[1] + limit_matrix[last + 1][nxt + 1]
+                    if cost < INF and total <= limit:
+                        add((mask | bit, nxt), (cost, total, label, nxt + 1))
+
+    best, best_label = INF, None
+    for last in range(n):
+        for label in labels.get((full, last), ()):
+            cost, total = label[0], label[1]
+            if closed:
+                cost += matrix[last + 1][0]
+                total += limit_matrix[last + 1][0]
+            if total <= limit and cost < best:
+                best, best_label = cost, label
+    if best_label is None:
+        return None, INF
+
+    order, label = [], best_label
+    while label is not None:
+        order.append(label[3])
+        label = label[2]
+    return [0] + order[::-1], best
+
+
+def _local_search(score, route):
+    # Reverse segments or move single stops while that improves the score. Costs can be
+    # asymmetric (A->B priced differently from B->A), so each candidate is fully re-scored.
+    best = score(route)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(route) - 1):
+            for j in range(i + 1, len(route)):
+                reversed_segment = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                moved = route[:i] + route[i + 1:j + 1] + [route[i]] + route[j + 1:]
+                for candidate in (reversed_segment, moved):
+                    cost = score(candidate)
+                    if cost < best:
+                        route, best, improved = candidate, cost, True
+    return route, best
+
+
+def _two_opt(matrix, closed, limit=None):
+    # Nearest-neighbour routes from every possible first stop (greedy on cost, and on the
+    # limit matrix too when there is one), each improved by local search. With a limit,
+    # routes are scored (amount over the limit, cost), so anything within it wins.
+    if limit is None:
+        score = lambda route: route_cost(matrix, route, closed)
+        greedy = [matrix]
+    else:
+        limit_matrix, cap = limit
+        score = lambda route: (
+            max(0.0, route_cost(limit_matrix, route, closed) - cap), route_cost(matrix, route, closed)
+        )
+        greedy = [matrix, limit_matrix]
+
+    best_route, best = None, None
+    for weights in greedy:
+        for first in range(1, len(matrix)):
+            route, remaining = [0, first], set(range(1, len(matrix))) - {first}
+            while remaining:
+                nxt = min(remaining, key=lambda j: weights[route[-1]][j])
+                route.append(nxt)
+                remaining.remove(nxt)
+            route, value = _local_search(score, route)
+            if best is None or value < best:
+                best_route, best = route, value
+
+    if limit is None:
+        return best_route, best
+    if best[0] > 0:
+        return None, INF
+    return best_route, best[1]
+
+
+def solve_route(matrix, closed=False, limit=None):
+    # Returns (order of node indices starting with 0, total cost, method). limit is an
+    # optional (limit matrix, cap): only routes whose total on that matrix stays within
+    # the cap are considered; (None, inf, method) when there is none.
+    if len(matrix) <= 2:
+        route = list(range(len(matrix)))
+        cost = route_cost(matrix, route, closed)
+        if limit is not None and route_cost(limit[0], route, closed) > limit[1]:
+            cost = INF
+        return (route if cost < INF else None), cost, "trivial"
+    if len(matrix) - 1 <= DP_MAX_STOPS:
+        if limit is None:
+            return (*_held_karp(matrix, closed), "exact")
+        return (*_held_karp_limited(matrix, closed, *limit), "exact")
+    return (*_two_opt(matrix, closed, limit), "2-opt")
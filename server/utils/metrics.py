@@ -0,0 +1,141 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Low-overhead in-process metrics, rendered in Prometheus text format at /metrics.
+# span() times a block into the per-stage histogram and, when a request has started a
+# timing breakdown, into that request's breakdown too (used for the Server-Timing header).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{v}"'.replace("\n", "\\n") for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._series = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {round(series[-2], 6)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+stage_seconds = Histogram("travel_stage_seconds", "Time spent per stage (llm, tool, amadeus, request)")
+stage_errors = Counter("travel_stage_errors_total", "Stages that raised an exception")
+llm_tokens = Counter("travel_llm_tokens_total", "OpenAI tokens used, by model and kind")
+
+# Callables returning {name: stats dict}; cache/router stats are read at scrape time
+_collectors = []
+
+
+def register_collector(prefix, collect):
+    _collectors.append((prefix, collect))
+
+
+def start_request_timing(timings=None):
+    # Spans in this context (and tasks/threads started from it) add to the returned dict
+    timings = {} if timings is None else timings
+    _request_timings.set(timings)
+    return timings
+
+
+@contextmanager
+def span(stage, name):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_errors.inc(stage=stage, name=name)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=stage, name=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            label = f"{stage}.{name}"
+            timings[label] = timings.get(label, 0.0) + elapsed
+
+
+def record_usage(model, usage):
+    if usage is None:
+        return
+    llm_tokens.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, kind="prompt")
+    llm_tokens.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, kind="completion")
+
+
+def server_timing_header(timings):
+    # Server-Timing: llm.select;dur=812.4, tool.search_flights;dur=301.2, ...
+    return ", ".join(f"{label};dur={seconds * 1000:.1f}" for label, seconds in timings.items())
+
+
+def render_prometheus():
+    lines = []
+    for metric in (stage_seconds, stage_errors, llm_tokens):
+        lines.extend(metric.render())
+
+    for prefix, collect in _collectors:
+        try:
+            groups = collect()
+        except Exception as e:
+            print("[DEBUG] metrics collector failed:", e)
+            continue
+        for group, stats in groups.items():
+            for field, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'{prefix}_{field}{{name="{group}"}} {value}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,193 @@
+import re
+from datetime import date
+from operator import itemgetter
+
+# Compact representation of Amadeus shopping results. The raw offers are parsed once into
+# small __slots__ records (and cached in that form), then ranked on several criteria so
+# only a handful of labelled picks ever reach the prompt.
+_DURATION_RE = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?)?")
+_INF = float("inf")
+
+
+def parse_duration(value):
+    # ISO 8601 duration ("PT12H35M", "P1DT2H") -> minutes
+    match = _DURATION_RE.fullmatch(value or "")
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes = (int(g or 0) for g in match.groups())
+    return days * 1440 + hours * 60 + minutes
+
+
+def format_duration(minutes):
+    if minutes is None:
+        return None
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+
+class FlightOffer:
+    __slots__ = ("price", "currency", "duration", "stops", "carrier", "origin", "departure",
+                 "destination", "arrival")
+
+    def __init__(self, price, currency, duration, stops, carrier, origin, departure, destination, arrival):
+        self.price = price
+        self.currency = currency
+        self.duration = duration
+        self.stops = stops
+        self.carrier = carrier
+        self.origin = origin
+        self.departure = departure
+        self.destination = destination
+        self.arrival = arrival
+
+    def to_dict(self, tags=()):
+        return {
+            "airline": self.carrier,
+            "price": self.price,
+            "currency": self.currency,
+            "duration": format_duration(self.duration),
+            "stops": self.stops,
+            "departure": {"iataCode": self.origin, "at": self.departure},
+            "arrival": {"iataCode": self.destination, "at": self.arrival},
+            "tags": list(tags)
+        }
+
+
+class HotelOffer:
+    __slots__ = ("name", "hotel_id", "price", "per_night", "currency", "rating", "check_in", "check_out")
+
+    def __init__(self, name, hotel_id, price, per_night, currency, rating, check_in, check_out):
+        self.name = name
+        self.hotel_id = hotel_id
+        self.price = price
+        self.per_night = per_night
+        self.currency = currency
+        self.rating = rating
+        self.check_in = check_in
+        self.check_out = check_out
+
+    def to_dict(self, tags=()):
+        return {
+            "name": self.name,
+            "price": self.price,
+            "pricePerNight": self.per_night,
+            "currency": self.currency,
+            "rating": self.rating,
+            "checkIn": self.check_in,
+            "checkOut": self.check_out,
+            "tags": list(tags)
+        }
+
+
+def parse_flight_offers(data):
+    offers = []
+    for offer in data or []:
+        try:
+            itineraries = offer["itineraries"]
+            first = itineraries[0]["segments"][0]
+            last = itineraries[0]["segments"][-1]
+            durations = [parse_duration(itinerary.get("duration")) for itinerary in itineraries]
+            carriers = offer.get("validatingAirlineCodes") or [first.get("carrierCode")]
+            offers.append(FlightOffer(
+                round(float(offer["price"]["total"]), 2),
+                offer["price"].get("currency"),
+                None if None in durations else sum(durations),
+                sum(len(itinerary["segments"]) - 1 for itinerary in itineraries),
+                carriers[0],
+                first["departure"].get("iataCode"),
+                first["departure"].get("at"),
+                last["arrival"].get("iataCode"),
+                last["arrival"].get("at")
+            ))
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            print("[DEBUG] skipping malformed flight offer:", e)
+    return offers
+
+
+def _nights(check_in, check_out):
+    try:
+        return max(1, (date.fromisoformat(check_out) - date.fromisoformat(check_in)).days)
+    except (TypeError, ValueError):
+        return 1
+
+
+def parse_hotel_offers(data):
+    # One record per hotel, using its cheapest available offer
+    hotels = []
+    for item in data or []:
+        try:
+            hotel = item["hotel"]
+            offer = min(item["offers"], key=lambda o: float(o["price"]["total"]))
+            price = round(float(offer["price"]["total"]), 2)
+            rating = hotel.get("rating")
+            hotels.append(HotelOffer(
+                hotel["name"],
+                hotel.get("hotelId"),
+                price,
+                round(price / _nights(offer.get("checkInDate"), offer.get("checkOutDate")), 2),
+                offer["price"].get("currency"),
+                int(rating) if rating and str(rating).isdigit() else None,
+                offer.get("checkInDate"),
+                offer.get("checkOutDate")
+            ))
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            print("[DEBUG] skipping malformed hotel offer:", e)
+    return hotels
+
+
+def pareto_front(rows):
+    # rows: (primary, secondary, tertiary, index) tuples, all minimized, sorted ascending, so
+    # every earlier row is at least as good on the primary criterion. The tertiary criterion
+    # (stops for flights, a constant 0 for hotels) takes few distinct values; for each we keep
+    # the best secondary value seen on the front, which makes the dominance check a handful
+    # of comparisons.
+    front = []
+    best = {}
+    for row in rows:
+        _, secondary, tertiary, _ = row
+        if any(value <= secondary for level, value in best.items() if level <= tertiary):
+            continue
+        front.append(row)
+        # A level is recorded even when its secondary value is inf (no duration)
+        if tertiary not in best or best[tertiary] > secondary:
+            best[tertiary] = secondary
+    return front
+
+
+def _select(items, rows, picks, k):
+    # Labelled picks first, then fill up to k from the Pareto front. Ranking works on
+    # plain value tuples built once per offer, which keeps it well under a millisecond.
+    rows.sort()
+    chosen = {}
+    for tag, key in picks:
+        chosen.setdefault(min(rows, key=key)[-1], []).append(tag)
+    for row in pareto_front(rows):
+        if len(chosen) >= k:
+            break
+        chosen.setdefault(row[-1], ["best_value"])
+    return [items[i].to_dict(tags) for i, tags in list(chosen.items())[:k]]
+
+
+def rank_flights(offers, k=3):
+    if not offers:
+        return []
+    rows = [
+        (o.price, _INF if o.duration is None else o.duration, o.stops, i)
+        for i, o in enumerate(offers)
+    ]
+    return _select(offers, rows, [
+        ("cheapest", itemgetter(0, 1)),
+        ("fastest", itemgetter(1, 0)),
+        ("fewest_stops", itemgetter(2, 0, 1))
+    ], k)
+
+
+def rank_hotels(hotels, k=3):
+    if not hotels:
+        return []
+    # No third criterion for hotels
+    rows = [(h.per_night, -(h.rating or 0), 0, i) for i, h in enumerate(hotels)]
+    return _select(hotels, rows, [
+        ("cheapest", itemgetter(0, 1)),
+        ("top_rated", itemgetter(1, 0))
+    ], k)
@@ -0,0 +1,214 @@
+import math
+import re
+import threading
+import zlib
+from collections import namedtuple
+
+from utils.gazetteer import get_gazetteer, normalize_name
+
+# Local intent router in front of the LLM guardrail. Obvious greetings and travel requests
+# are decided in-process; only messages the rules and the small n-gram model can't call
+# confidently are escalated to the gpt-4o-mini classifier.
+GREETING, TRAVEL, OFF_TOPIC, UNSURE = "greeting", "travel", "off_topic", "unsure"
+
+Route = namedtuple("Route", ["intent", "source", "confidence"])
+
+GREETING_RE = re.compile(
+    r"^\s*(hi|hello|hey|hiya|howdy|greetings|yo|good (morning|afternoon|evening|day))"
+    r"(\s+(there|all|everyone|bot|travelbot))?\s*[!.,?😊👋]*\s*$",
+    re.IGNORECASE
+)
+
+# Words that on their own mean travel; generic ones ("night", "budget", "tickets", "stay")
+# are left to the model so "the football match last night" is not routed as travel
+TRAVEL_RE = re.compile(
+    r"\b(flights?|fly|flying|airlines?|airports?|depart(ure|ing)?|arriv(e|al|ing)|"
+    r"return trip|one[- ]way|layovers?|hotels?|hostels?|resorts?|accommodation|"
+    r"check[- ]?(in|out)|tours?|sightseeing|excursions?|safari|museums?|"
+    r"trip|travel(l?ing)?|vacation|holiday|honeymoon|getaway|destinations?|itinerary|visit(ing)?|"
+    r"visa|passport|beach(es)?|backpacking|cruises?)\b",
+    re.IGNORECASE
+)
+
+OFF_TOPIC_RE = re.compile(
+    r"\b(python|javascript|code|program(ming)?|debug|sql|math|equation|integral|homework|essay|"
+    r"poem|song lyrics|recipe|bitcoin|crypto|stock price|medical|diagnos(e|is)|lawsuit|"
+    r"script|spreadsheet|excel)\b",
+    re.IGNORECASE
+)
+
+# Gazetteer names that are also everyday English words: "a nice poem", "male or female"
+COMMON_WORD_NAMES = {"nice", "male", "canton", "reading", "mobile", "split", "bath", "orange"}
+
+# Seed corpus for the hashed n-gram naive Bayes model
+TRAINING_DATA = [
+    (TRAVEL, "find me a flight from nairobi to paris next friday"),
+    (TRAVEL, "cheapest way to get to london in june"),
+    (TRAVEL, "hotels in dubai for three nights"),
+    (TRAVEL, "what can i do in cape town this weekend"),
+    (TRAVEL, "recommend tours near me"),
+    (TRAVEL, "i want to go somewhere romantic for my anniversary"),
+    (TRAVEL, "where should i go for a relaxing week away"),
+    (TRAVEL, "how much would a week in bali cost"),
+    (TRAVEL, "estimate my budget for flights and hotel"),
+    (TRAVEL, "book me a room in rome from 3 to 7 may"),
+    (TRAVEL, "any good places to eat and see in tokyo"),
+    (TRAVEL, "i need to be in new york on monday"),
+    (TRAVEL, "what about the day after"),
+    (TRAVEL, "show me cheaper options"),
+    (TRAVEL, "and hotels there"),
+    (TRAVEL, "going to mombasa with my family in december"),
+    (TRAVEL, "best time to visit zanzibar"),
+    (TRAVEL, "things to do in kigali"),
+    (TRAVEL, "museum and gallery tours in amsterdam"),
+    (TRAVEL, "game drive in the masai mara"),
+    (TRAVEL, "can you plan a trip to egypt for me"),
+    (TRAVEL, "direct flights only please"),
+    (TRAVEL, "leaving on the 24th of may returning a week later"),
+    (TRAVEL, "adventure destinations under 1000 dollars"),
+    (OFF_TOPIC, "write a python function to reverse a list"),
+    (OFF_TOPIC, "what is the capital gains tax rate"),
+    (OFF_TOPIC, "solve this equation for x"),
+    (OFF_TOPIC, "tell me a joke about cats"),
+    (OFF_TOPIC, "who won the football match last night"),
+    (OFF_TOPIC, "give me a recipe for chocolate cake"),
+    (OFF_TOPIC, "explain quantum computing"),
+    (OFF_TOPIC, "write a poem about love"),
+    (OFF_TOPIC, "what is the meaning of life"),
+    (OFF_TOPIC, "help me with my math homework"),
+    (OFF_TOPIC, "should i buy bitcoin"),
+    (OFF_TOPIC, "how do i fix my laptop"),
+    (OFF_TOPIC, "what are the symptoms of flu"),
+    (OFF_TOPIC, "translate this sentence into french"),
+    (OFF_TOPIC, "summarize this article for me"),
+    (OFF_TOPIC, "who is the president of the united states"),
+    (OFF_TOPIC, "debug my javascript code"),
+    (OFF_TOPIC, "what is your favourite movie"),
+    (OFF_TOPIC, "write a cover letter for a job in london"),
+    (OFF_TOPIC, "what was the new york knicks score"),
+    (OFF_TOPIC, "explain the history of berlin in 300 words"),
+    (OFF_TOPIC, "my friend from tokyo needs help with her resume"),
+]
+
+HASH_BUCKETS = 1 << 14
+TRAVEL_CONFIDENCE = 0.85
+OFF_TOPIC_CONFIDENCE = 0.95
+
+CITY_TAG = "<city>"
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def _features(text, tags=()):
+    # tags: extra whole-message features such as "<city>"
+    words = _WORD_RE.findall(text.lower())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])] + list(tags)
+    return [zlib.crc32(g.encode()) % HASH_BUCKETS for g in grams]
+
+
+class NGramClassifier:
+    # Multinomial naive Bayes over hashed word unigrams and bigrams, plus any tags the
+    # tagger adds for a message
+    def __init__(self, examples, alpha=1.0, tagger=None):
+        self.tagger = tagger or (lambda text: ())
+        self.labels = sorted({label for label, _ in examples})
+        counts = {label: {} for label in self.labels}
+        totals = {label: 0 for label in self.labels}
+        docs = {label: 0 for label in self.labels}
+        for label, text in examples:
+            docs[label] += 1
+            for f in _features(text, self.tagger(text)):
+                counts[label][f] = counts[label].get(f, 0) + 1
+                totals[label] += 1
+
+        vocab = len({f for c in counts.values() for f in c})
+        self._log_prior = {l: math.log(docs[l] / len(examples)) for l in self.labels}
+        self._log_prob = {
+            l: {f: math.log((n + alpha) / (totals[l] + alpha * vocab)) for f, n in counts[l].items()}
+            for l in self.labels
+        }
+        self._log_unseen = {l: math.log(alpha / (totals[l] + alpha * vocab)) for l in self.labels}
+
+    def predict(self, text):
+        features = _features(text, self.tagger(text))
+        scores = {}
+        for l in self.labels:
+            probs, unseen = self._log_prob[l], self._log_unseen[l]
+            scores[l] = self._log_prior[l] + sum(probs.get(f, unseen) for f in features)
+        top = max(scores.values())
+        norm = sum(math.exp(s - top) for s in scores.values())
+        label = max(scores, key=scores.get)
+        return label, 1.0 / norm
+
+
+class IntentRouter:
+    def __init__(self, examples=TRAINING_DATA):
+        # A city name is evidence for travel, not proof ("a cover letter for a job in Dubai"),
+        # so it is a feature for the model rather than a rule
+        self.model = NGramClassifier(examples, tagger=self._tags)
+        self._lock = threading.Lock()
+        self.decisions = {}
+        self.total = 0
+
+    def _mentions_city(self, text):
+        words = normalize_name(text).split()
+        gazetteer = get_gazetteer()
+        for n in (3, 2, 1):
+            for i in range(len(words) - n + 1):
+                phrase = " ".join(words[i:i + n])
+                if len(phrase) >= 4 and phrase not in COMMON_WORD_NAMES and gazetteer.has_name(phrase):
+                    return True
+        return False
+
+    def _tags(self, text):
+        return (CITY_TAG,) if self._mentions_city(text) else ()
+
+    def classify(self, message):
+        text = (message or "").strip()
+        if not text:
+            return Route(OFF_TOPIC, "rule", 1.0)
+        if GREETING_RE.match(text):
+            return Route(GREETING, "rule", 1.0)
+        off_topic = OFF_TOPIC_RE.search(text)
+        if TRAVEL_RE.search(text):
+            # "a python script for my trip budget" could be either; let the classifier decide
+            if off_topic:
+                return Route(UNSURE, "rule", 1.0)
+            return Route(TRAVEL, "rule", 1.0)
+
+        label, confidence = self.model.predict(text)
+        if label == TRAVEL and confidence >= TRAVEL_CONFIDENCE:
+            return Route(TRAVEL, "model", confidence)
+        if label == OFF_TOPIC and confidence >= OFF_TOPIC_CONFIDENCE and off_topic:
+            return Route(OFF_TOPIC, "model", confidence)
+        return Route(UNSURE, "model", confidence)
+
+    def route(self, message):
+        decision = self.classify(message)
+        with self._lock:
+            key = f"{decision.intent}:{decision.source}"
+            self.decisions[key] = self.decisions.get(key, 0) + 1
+            self.total += 1
+        return decision
+
+    def stats(self):
+        with self._lock:
+            escalated = sum(n for k, n in self.decisions.items() if k.startswith(UNSURE))
+            return {
+                "total": self.total,
+                "decisions": dict(self.decisions),
+                "escalation_rate": round(escalated / self.total, 4) if self.total else 0.0,
+            }
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = IntentRouter()
+    return _router
@@ -0,0 +1,116 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Server-side conversation state, keyed by conversation ID, so clients only send the new message.
+# A session looks like {"history": [...], "lastKnownCity": str | None, "location": dict | None}.
+
+
+def new_session():
+    return {"history": [], "lastKnownCity": None, "location": None}
+
+
+def new_conversation_id():
+    return uuid.uuid4().hex
+
+
+class InMemorySessionStore:
+    def __init__(self, maxsize=5000, ttl=6 * 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(conversation_id)
+            if entry is None:
+                return None
+            session, touched_at = entry
+            if now - touched_at > self.ttl:
+                del self._data[conversation_id]
+                return None
+            self._data.move_to_end(conversation_id)
+            return session
+
+    def save(self, conversation_id, session):
+        with self._lock:
+            self._data[conversation_id] = (session, time.monotonic())
+            self._data.move_to_end(conversation_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, conversation_id):
+        with self._lock:
+            self._data.pop(conversation_id, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteSessionStore:
+    # Survives restarts and can be shared by several worker processes on one host.
+    # Expired sessions are ignored on read and deleted every PURGE_EVERY writes.
+    PURGE_EVERY = 500
+
+    def __init__(self, path, ttl=6 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+        # Each forked worker opens its own connections
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, conversation_id):
+        row = self._connect().execute(
+            "SELECT data, updated_at FROM sessions WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def save(self, conversation_id, session):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, updated_at) VALUES (?, ?, ?)",
+                (conversation_id, json.dumps(session, default=str), time.time())
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl,))
+
+    def delete(self, conversation_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (conversation_id,))
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store():
+    # SESSION_BACKEND=sqlite (with SESSION_DB_PATH) persists sessions; default is in-memory LRU
+    backend = os.getenv("SESSION_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_DB_PATH", "sessions.db"))
+    return InMemorySessionStore(maxsize=int(os.getenv("SESSION_MAX", "5000")))
@@ -0,0 +1,246 @@
+import json
+import re
+
+from tool_schemas import tools
+from utils.history import count_text_tokens
+
+# The model-facing edge of the tools: strict parsing of the arguments the model sends,
+# and compact serialization of what goes back. Tabular tools (flights, fares, hotels,
+# tours) become pipe-separated tables with only the fields the model needs, prices and
+# timestamps rounded; anything else becomes minified JSON. Every output is capped.
+TOOL_OUTPUT_MAX_TOKENS = 700
+DESCRIPTION_CHARS = 140
+
+_PARAMETERS = {tool["function"]["name"]: tool["function"]["parameters"] for tool in tools}
+_TIMESTAMP_RE = re.compile(r"^(\d{4}-\d\d-\d\d)T(\d\d:\d\d)(?::\d\d(?:\.\d+)?)?")
+
+
+class ToolArgumentError(ValueError):
+    pass
+
+
+def _coerce(func_name, name, value, expected):
+    # bool is an int subclass, so it is only accepted where a boolean is expected
+    if expected == "string":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if isinstance(value, str):
+            return value
+    elif expected in ("number", "integer"):
+        if isinstance(value, str):
+            try:
+                value = float(value.strip())
+            except ValueError:
+                pass
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if expected == "number":
+                return value
+            if float(value).is_integer():
+                return int(value)
+    elif expected == "boolean":
+        if isinstance(value, bool):
+            return value
+    elif expected == "object":
+        if isinstance(value, dict):
+            return value
+    elif expected == "array":
+        if isinstance(value, list):
+            return value
+    else:
+        return value
+    raise ToolArgumentError(f"'{name}' for {func_name} should be of type {expected}.")
+
+
+def parse_tool_arguments(func_name, raw):
+    # json.loads plus a check against the tool's schema: required fields present, types
+    # right (numeric strings are accepted for numbers), unknown fields dropped
+    schema = _PARAMETERS.get(func_name)
+    if schema is None:
+        raise ToolArgumentError(f"Unknown tool '{func_name}'.")
+    try:
+        args = json.loads(raw or "{}")
+    except json.JSONDecodeError as e:
+        raise ToolArgumentError(f"The arguments for {func_name} are not valid JSON: {e.msg}.")
+    if not isinstance(args, dict):
+        raise ToolArgumentError(f"The arguments for {func_name} must be an object.")
+
+    properties = schema.get("properties", {})
+    parsed = {}
+    for name, value in args.items():
+        spec = properties.get(name)
+        if spec is None:
+            print(f"[DEBUG] {func_name}: dropping unknown argument '{name}'")
+            continue
+        if value is None:
+            continue
+        parsed[name] = _coerce(func_name, name, value, spec.get("type"))
+
+    missing = [name for name in schema.get("required", []) if name not in parsed]
+    if missing:
+        raise ToolArgumentError(f"Missing required {func_name} parameters: {', '.join(missing)}.")
+    return parsed
+
+
+def _price(value):
+    if value is None or value == "":
+        return "-"
+    try:
+        return f"{float(value):.2f}".rstrip("0").rstrip(".")
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _timestamp(value):
+    # "2027-06-03T23:55:00" -> "2027-06-03 23:55"
+    return _TIMESTAMP_RE.sub(r"\1 \2", value or "")
+
+
+def _clip(text, limit):
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _cell(value):
+    if value is None:
+        return "-"
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def _render_table(title, columns, rows, max_tokens):
+    lines = [title, "|".join(columns)]
+    used = count_text_tokens("\n".join(lines))
+    for i, row in enumerate(rows):
+        line = "|".join(_cell(value) for value in row)
+        cost = count_text_tokens(line) + 1
+        # Leave room for the truncation marker
+        if used + cost > max_tokens - 10:
+            lines.append(f"…[{len(rows) - i} more rows truncated]")
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+def _flights(output):
+    flights = output["flights"]
+    return (
+        f"flights: {len(flights)} ranked of {output.get('total_offers', len(flights))} offers",
+        ["airline", "price", "currency", "duration", "stops", "departure", "arrival", "tags"],
+        [
+            [
+                f["airline"], _price(f["price"]), f.get("currency"), f.get("duration"), f.get("stops"),
+                f"{f['departure'].get('iataCode')} {_timestamp(f['departure'].get('at'))}",
+                f"{f['arrival'].get('iataCode')} {_timestamp(f['arrival'].get('at'))}",
+                "+".join(f.get("tags", []))
+            ]
+            for f in flights
+        ]
+    )
+
+
+def _fare_calendar(output):
+    cheapest = output["cheapest"]
+    return (
+        f"fares {output['origin']}->{output['destination']} in {cheapest.get('currency')}, "
+        f"cheapest {cheapest['date']} at {_price(cheapest['price'])}",
+        ["date", "price", "airline", "stops"],
+        [
+            [day["date"], _price(day["price"]), day.get("airline"), day.get("stops")]
+            if day.get("price") is not None else [day["date"], day.get("status", "-"), None, None]
+            for day in output["days"]
+        ]
+    )
+
+
+def _hotels(output):
+    hotels = output["hotels"]
+    return (
+        f"hotels: {len(hotels)} ranked of {output.get('total_offers', len(hotels))} offers",
+        ["name", "total", "per_night", "currency", "stars", "check_in", "check_out", "tags"],
+        [
+            [
+                h["name"], _price(h["price"]), _price(h.get("pricePerNight")), h.get("currency"),
+                h.get("rating"), h.get("checkIn"), h.get("checkOut"), "+".join(h.get("tags", []))
+            ]
+            for h in hotels
+        ]
+    )
+
+
+def _tours(output):
+    activities = [a for a in output["activities"] if "name" in a]
+    if not activities:
+        # Just the "no matching activities" message; plain JSON says it best
+        return None
+    return (
+        f"activities in {output.get('city')}: page {output.get('page', 1)}, "
+        f"{len(activities)} of {output.get('total_matches', len(activities))} matches"
+        + (", more available" if output.get("has_more") else ""),
+        ["name", "price", "currency", "description", "booking_link"],
+        [
+            [
+                _clip(a["name"], 80), _price(a.get("price")), a.get("currency"),
+                _clip(a.get("shortDescription"), DESCRIPTION_CHARS), a.get("bookingLink")
+            ]
+            for a in activities
+        ]
+    )
+
+
+def _itinerary(output):
+    budget = output["budget"]
+    title = (
+        f"route {'->'.join(output['route'])} ({output['method']}, by {output['optimized_for']}), "
+        f"{output['nights_per_city']} nights per city, flights {_price(budget['flights'])} {budget.get('currency')}"
+    )
+    if "budget" in budget:
+        title += f" of budget {_price(budget['budget'])} ({_price(budget['remaining'])} left)"
+    return (
+        title,
+        ["from", "to", "date", "price", "duration", "airline"],
+        [
+            [
+                leg["from"], leg["to"], leg["date"],
+                _price(leg["price"]) + ("~" if leg.get("estimate") else ""),
+                leg.get("duration"), leg.get("airline")
+            ]
+            for leg in output["legs"]
+        ]
+    )
+
+
+TABLE_FORMATS = {
+    "plan_itinerary": _itinerary,
+    "search_flights": _flights,
+    "search_fare_calendar": _fare_calendar,
+    "search_hotels": _hotels,
+    "recommend_tours": _tours,
+}
+
+
+def _compact(value):
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return {k: _compact(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_compact(v) for v in value]
+    return value
+
+
+def serialize_tool_output(func_name, output, max_tokens=TOOL_OUTPUT_MAX_TOKENS):
+    # Content of the "tool" message for the follow-up completion
+    formatter = TABLE_FORMATS.get(func_name)
+    if formatter and isinstance(output, dict) and "error" not in output:
+        try:
+            table = formatter(output)
+            if table:
+                return _render_table(*table, max_tokens)
+        except (KeyError, TypeError, AttributeError) as e:
+            print(f"[DEBUG] {func_name}: falling back to JSON output:", e)
+
+    text = json.dumps(_compact(output), separators=(",", ":"), ensure_ascii=False, default=str)
+    tokens = count_text_tokens(text)
+    if tokens > max_tokens:
+        text = text[:len(text) * max_tokens // tokens] + "…[truncated]"
+    return text
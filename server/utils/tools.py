@@ -1,52 +1,178 @@
 import os
-from dotenv import load_dotenv
-import requests
-from amadeus import Client, ResponseError
-from dateparser import parse as parse_date
-from datetime import datetime
-
-# Load environment variables first!
-load_dotenv()
-
-amadeus = Client(
-    client_id=os.getenv("AMADEUS_API_KEY"),
-    client_secret=os.getenv("AMADEUS_API_SECRET")
-)
-
-
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from datetime import date, timedelta
+from utils.cache import location_cache, shopping_cache, route_cache, normalize_city, geo_key, MISSING, NEGATIVE_TTL
+from utils.gazetteer import get_gazetteer
+from utils.dates import parse_and_validate_date, resolve_date_range, month_window
+from utils.metrics import span
+from utils.offers import parse_flight_offers, parse_hotel_offers, rank_flights, rank_hotels, format_duration
+from utils.itinerary import solve_route, INF
+from utils.activities import ActivityIndex, parse_activities, geohash, geohash_center, ACTIVITY_RADIUS_KM
+from utils.upstream import PooledHTTP, RateLimiter, call_with_retries, UpstreamUnavailable, RETRY_STATUSES
+
+# The Amadeus SDK is imported and the client built on first use, so importing this
+# module (and starting the server) stays cheap
+_amadeus = None
+_amadeus_lock = threading.Lock()
+
+
+def get_amadeus():
+    global _amadeus
+    if _amadeus is None:
+        with _amadeus_lock:
+            if _amadeus is None:
+                from amadeus import Client
+
+                # AMADEUS_HOST / AMADEUS_PORT / AMADEUS_SSL point the SDK at another server
+                # (e.g. the bench/ stand-in)
+                endpoint = {}
+                if os.getenv("AMADEUS_HOST"):
+                    endpoint = {
+                        "host": os.getenv("AMADEUS_HOST"),
+                        "port": int(os.getenv("AMADEUS_PORT", "443")),
+                        "ssl": os.getenv("AMADEUS_SSL", "true").lower() != "false"
+                    }
+
+                # Keep-alive pool instead of a fresh urllib connection per call; the SDK still
+                # handles fetching and refreshing the OAuth token (through the same pool)
+                _amadeus = Client(
+                    client_id=os.getenv("AMADEUS_API_KEY"),
+                    client_secret=os.getenv("AMADEUS_API_SECRET"),
+                    http=PooledHTTP(),
+                    **endpoint
+                )
+    return _amadeus
+
+
+class AmadeusError(Exception):
+    # What amadeus_get raises for Amadeus error responses, so callers can handle them
+    # without importing the SDK
+    def __init__(self, status_code, body):
+        super().__init__(f"Amadeus request failed with status {status_code}")
+        self.status_code = status_code
+        self.body = body
+
+# Per-endpoint deadlines (seconds), further capped by what is left of the turn's budget
+AMADEUS_TIMEOUTS = {
+    "flight_offers": 20,
+    "hotel_offers": 20,
+    "activities": 15,
+    "locations": 5,
+    "reverse_geocoding": 5,
+}
 
-def parse_and_validate_date(raw_date):
-    today = datetime.now()
-    current_year = today.year
-    next_year = current_year + 1
-    lower_date = raw_date.lower().strip()
+# Client-side cap on Amadeus requests per second across all threads. The bucket lives in
+# each process, so under several workers (WEB_CONCURRENCY) each gets its share of the quota.
+amadeus_rate_limiter = RateLimiter(
+    float(os.getenv("AMADEUS_MAX_RPS", "10")) / max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+)
 
-    if lower_date == "this year":
-        return datetime(current_year, 1, 1), "ok"
-    elif lower_date == "next year":
-        return datetime(next_year, 1, 1), "ok"
 
-    parsed = parse_date(
-        raw_date,
-        settings={
-            "PREFER_DAY_OF_MONTH": "first",
-            "PREFER_DATES_FROM": "future",
-            "RELATIVE_BASE": today
-        }
+def is_retryable_amadeus_error(e):
+    # Network errors (no status) and 429/5xx are worth retrying; other 4xx are not
+    from amadeus import ResponseError
+
+    if not isinstance(e, ResponseError):
+        return False
+    status = getattr(e.response, "status_code", None)
+    return status is None or status in RETRY_STATUSES
+
+
+def amadeus_get(endpoint, resource, **params):
+    # Single place every Amadeus request goes through: timed per endpoint, retried with
+    # jittered backoff, and failing fast while the endpoint's circuit breaker is open
+    from amadeus import ResponseError
+
+    def call():
+        amadeus_rate_limiter.acquire()
+        return resource.get(**params)
+
+    with span("amadeus", endpoint):
+        try:
+            return call_with_retries(
+                f"amadeus.{endpoint}",
+                call,
+                is_retryable_amadeus_error,
+                timeout=AMADEUS_TIMEOUTS.get(endpoint, 10)
+            )
+        except ResponseError as e:
+            response = getattr(e, "response", None)
+            raise AmadeusError(getattr(response, "status_code", None), getattr(response, "body", None)) from e
+
+
+# Shopping response cache TTLs (seconds): (fresh, extra time a stale copy may still be served)
+FLIGHT_OFFERS_TTL = (5 * 60, 10 * 60)
+HOTEL_OFFERS_TTL = (10 * 60, 20 * 60)
+ACTIVITIES_TTL = (6 * 3600, 24 * 3600)
+
+TOURS_PAGE_SIZE = 5
+TOURS_MAX_PAGE_SIZE = 10
+
+# How many ranked offers (cheapest, fastest, ...) are handed to the model
+FLIGHT_RESULTS = 3
+HOTEL_RESULTS = 3
+
+FARE_CALENDAR_MAX_DAYS = 31
+FARE_CALENDAR_CONCURRENCY = 4
+
+# Every ordered city pair is one flight search, so the matrix grows as N * (N - 1)
+ITINERARY_MAX_CITIES = 10
+ITINERARY_CONCURRENCY = 4
+
+
+def _fan_out(fn, calls, workers):
+    # Runs fn(*args) for each args tuple on a small pool. Each worker runs in a copy of this
+    # context so the turn deadline applies; once the upstream is unavailable (breaker open
+    # or out of time) the remaining calls are skipped and come back as None.
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, fn, *args) for args in calls]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except (UpstreamUnavailable, CancelledError):
+                for pending in futures:
+                    pending.cancel()
+                results.append(None)
+    return results
+
+
+def fetch_flight_offers(origin_code, destination_code, departure):
+    # Shared by search_flights and search_fare_calendar so each can reuse the other's cached days.
+    # Cached as compact FlightOffer records rather than the raw JSON.
+    return shopping_cache.get_or_fetch(
+        ("flights", origin_code.upper(), destination_code.upper(), departure, 1),
+        lambda: parse_flight_offers(amadeus_get("flight_offers", get_amadeus().shopping.flight_offers_search,
+            originLocationCode=origin_code,
+            destinationLocationCode=destination_code,
+            departureDate=departure,
+            adults=1
+        ).data),
+        *FLIGHT_OFFERS_TTL
     )
 
-    if not parsed:
-        return None, "unrecognized"
-
-    if parsed.month < today.month or (parsed.month == today.month and parsed.day < today.day):
-        parsed = parsed.replace(year=next_year)
-    else:
-        parsed = parsed.replace(year=current_year)
 
-    if parsed.date() < today.date():
-        return None, "past"
+def confirmation_message(func_name, args):
+    # What the user is told while a search runs. Built from the arguments alone (dates are
+    # resolved locally, nothing upstream), so it can go out before any tool starts.
+    if func_name == "search_flights":
+        parsed, status = parse_and_validate_date(args.get("departure_date"))
+        if status == "ok":
+            return f"Got it! You want to search for flights on **{parsed.strftime('%A, %B %d, %Y')}**. Let me check..."
+    elif func_name == "search_fare_calendar" and args.get("origin") and args.get("destination"):
+        window, _ = _fare_window(args.get("start_date"), args.get("end_date"), args.get("flexibility_days"))
+        if window:
+            return (f"Checking the cheapest fares from **{args['origin']}** to **{args['destination']}** "
+                    f"between **{window[0].strftime('%B %d')}** and **{window[1].strftime('%B %d, %Y')}**...")
+    elif func_name == "plan_itinerary" and args.get("cities"):
+        start, status = parse_and_validate_date(args.get("start_date"))
+        if status == "ok":
+            cities = ([args["origin"]] if args.get("origin") else []) + [str(city) for city in args["cities"]]
+            return f"Planning the best order for **{', '.join(cities)}** starting **{start.strftime('%A, %B %d, %Y')}**..."
+    return None
 
-    return parsed, "ok"
 
 def search_flights(origin, destination, departure_date):
     parsed_date, status = parse_and_validate_date(departure_date)
@@ -55,61 +181,287 @@ def search_flights(origin, destination, departure_date):
     if status == "past":
         return {"error": f"The date '{departure_date}' seems to be in the past. Did you mean this year or next year?"}
 
-    readable_date = parsed_date.strftime("%A, %B %d, %Y")
-    confirmed_msg = f"Got it! You want to search for flights on **{readable_date}**. Let me check..."
+    try:
+        origin_code = get_iata_code(origin)
+        destination_code = get_iata_code(destination)
+        if not origin_code or not destination_code:
+            return {"error": f"Could not find IATA codes for '{origin}' or '{destination}'."}
+
+        offers = fetch_flight_offers(origin_code, destination_code, parsed_date.strftime("%Y-%m-%d"))
+
+        return {
+            "total_offers": len(offers),
+            "flights": rank_flights(offers, FLIGHT_RESULTS)
+        }
+
+    except UpstreamUnavailable as e:
+        print("Amadeus unavailable:", e)
+        return {"error": "Flight search is temporarily unavailable. Please try again in a moment."}
+
+    except AmadeusError as e:
+        print("Amadeus API error:", e.status_code, e.body)
+        return {"error": "Failed to fetch flights. Please check your input parameters."}
+
+
+def _cheapest_fare(origin_code, destination_code, day):
+    departure = day.strftime("%Y-%m-%d")
+    try:
+        offers = fetch_flight_offers(origin_code, destination_code, departure)
+    except UpstreamUnavailable:
+        raise
+    except AmadeusError as e:
+        print("Amadeus API error:", departure, e.status_code)
+        return {"date": departure, "price": None, "status": "unavailable"}
+
+    if not offers:
+        return {"date": departure, "price": None, "status": "no_flights"}
+
+    best = min(offers, key=lambda offer: offer.price)
+    return {
+        "date": departure,
+        "price": best.price,
+        "currency": best.currency,
+        "airline": best.carrier,
+        "stops": best.stops
+    }
+
+
+def _fare_window(start_date, end_date=None, flexibility_days=None, today=None):
+    # Returns ((first day, last day), None) or (None, error message)
+    today = today or date.today()
+    month = month_window(start_date, today)
+    if month:
+        start = month[0]
+    else:
+        parsed, status = parse_and_validate_date(start_date, today)
+        if status != "ok":
+            return None, f"I couldn't use the date '{start_date}'. Please provide an upcoming travel date or month."
+        start = parsed.date()
+
+    if flexibility_days:
+        # ± N days around the requested date, never before today
+        flex = abs(int(flexibility_days))
+        first = max(start - timedelta(days=flex), today)
+        last = start + timedelta(days=flex)
+    elif end_date:
+        end, end_status = parse_and_validate_date(end_date, today)
+        if end_status != "ok" or end.date() < start:
+            return None, f"I couldn't use the date range '{start_date}' to '{end_date}'."
+        first, last = start, end.date()
+    elif month:
+        # A bare month ("June") means what is left of that month
+        first, last = month
+    else:
+        # A single day means the rest of its month
+        first = start
+        next_month = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+        last = next_month - timedelta(days=1)
+
+    return (first, min(last, first + timedelta(days=FARE_CALENDAR_MAX_DAYS - 1))), None
+
+
+def search_fare_calendar(origin, destination, start_date, end_date=None, flexibility_days=None):
+    window, error = _fare_window(start_date, end_date, flexibility_days)
+    if error:
+        return {"error": error}
+    first, last = window
+    days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
 
     origin_code = get_iata_code(origin)
     destination_code = get_iata_code(destination)
-
     if not origin_code or not destination_code:
         return {"error": f"Could not find IATA codes for '{origin}' or '{destination}'."}
 
+    fares = _fan_out(
+        _cheapest_fare,
+        [(origin_code, destination_code, day) for day in days],
+        FARE_CALENDAR_CONCURRENCY
+    )
+    grid = [
+        fare or {"date": day.strftime("%Y-%m-%d"), "price": None, "status": "unavailable"}
+        for day, fare in zip(days, fares)
+    ]
+
+    priced = [d for d in grid if d["price"] is not None]
+    if not priced:
+        return {"error": f"Couldn't find fares from {origin_code} to {destination_code} for those dates."}
+
+    return {
+        "origin": origin_code,
+        "destination": destination_code,
+        "cheapest": min(priced, key=lambda d: d["price"]),
+        "days": grid
+    }
+
+
+def _route_edge(origin_code, destination_code, departure):
+    # One cell of the itinerary cost matrix: cheapest fare and shortest duration for a pair
+    key = (origin_code, destination_code, departure)
+    cached = route_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
     try:
-        response = amadeus.shopping.flight_offers_search.get(
-            originLocationCode=origin_code,
-            destinationLocationCode=destination_code,
-            departureDate=parsed_date.strftime("%Y-%m-%d"),
-            adults=1
-        )
-        data = response.data
+        offers = fetch_flight_offers(origin_code, destination_code, departure)
+    except AmadeusError as e:
+        print("Amadeus API error:", origin_code, destination_code, departure, e.status_code)
+        return None
 
-        return {
-            "confirm_msg": confirmed_msg,
-            "flights": [
-                {
-                    "airline": offer['validatingAirlineCodes'][0],
-                    "price": offer['price']['total'],
-                    "departure": offer['itineraries'][0]['segments'][0]['departure'],
-                    "arrival": offer['itineraries'][0]['segments'][-1]['arrival']
-                }
-                for offer in data[:3]
-            ]
+    edge = None
+    if offers:
+        best = min(offers, key=lambda offer: offer.price)
+        durations = [offer.duration for offer in offers if offer.duration is not None]
+        edge = {
+            "price": best.price,
+            "currency": best.currency,
+            "airline": best.carrier,
+            "duration": min(durations) if durations else None
         }
+    route_cache.set(key, edge, ttl=None if edge else NEGATIVE_TTL)
+    return edge
+
+
+def plan_itinerary(cities, start_date, origin=None, return_to_origin=False, nights_per_city=3,
+                   end_date=None, budget=None, optimize="price"):
+    start, status = parse_and_validate_date(start_date)
+    if status != "ok":
+        return {"error": f"I couldn't use the date '{start_date}'. Please provide an upcoming start date."}
+
+    codes = []
+    for city in ([origin] if origin else []) + [str(city) for city in cities]:
+        code = get_iata_code(city)
+        if not code:
+            return {"error": f"Could not find an airport for '{city}'."}
+        if code not in codes:
+            codes.append(code)
+    if len(codes) < 2:
+        return {"error": "Please give me at least two different cities to plan a route."}
+    if len(codes) > ITINERARY_MAX_CITIES:
+        return {"error": f"I can plan routes through up to {ITINERARY_MAX_CITIES} cities at a time."}
+
+    stops = len(codes) - 1
+    nights = max(1, int(nights_per_city or 1))
+    if end_date:
+        end, end_status = parse_and_validate_date(end_date)
+        if end_status != "ok" or end <= start:
+            return {"error": f"I couldn't use the date range '{start_date}' to '{end_date}'."}
+        window = (end - start).days
+        if window < stops:
+            return {"error": f"Visiting {stops} cities needs at least {stops} nights between those dates."}
+        # Shorten the stays so the whole trip fits in the window
+        nights = min(nights, window // stops)
+
+    # The ordering is solved on fares for the start date; edges are cached per pair and date,
+    # so re-planning after adding or removing a city only searches the new pairs
+    reference = start.strftime("%Y-%m-%d")
+    pairs = [
+        (a, b) for a in range(len(codes)) for b in range(len(codes))
+        if a != b and (b != 0 or return_to_origin)
+    ]
+    edges = dict(zip(pairs, _fan_out(
+        _route_edge,
+        [(codes[a], codes[b], reference) for a, b in pairs],
+        ITINERARY_CONCURRENCY
+    )))
+
+    matrices = {
+        metric: [
+            [
+                edges[(a, b)][metric] if edges.get((a, b)) and edges[(a, b)][metric] is not None else INF
+                for b in range(len(codes))
+            ]
+            for a in range(len(codes))
+        ]
+        for metric in ("price", "duration")
+    }
+    metric = "duration" if optimize == "duration" else "price"
+    route = None
+    if metric == "duration" and budget is not None:
+        # Fastest order whose fares (on the start date) fit the budget
+        route, _, method = solve_route(
+            matrices["duration"], closed=return_to_origin, limit=(matrices["price"], float(budget))
+        )
+        if route is None:
+            # Nothing fits: the cheapest order comes closest
+            print("[DEBUG] no route within budget, falling back to the cheapest order")
+            metric = "price"
+    if route is None:
+        route, _, method = solve_route(matrices[metric], closed=return_to_origin)
+    if route is None:
+        return {"error": "I couldn't find flights connecting all of those cities."}
+
+    # Price each leg on the day it is actually flown; fall back to the matrix estimate
+    order = route + [0] if return_to_origin else route
+    hops = list(zip(order, order[1:]))
+    legs_on_dates = [
+        (codes[a], codes[b], (start + timedelta(days=i * nights)).strftime("%Y-%m-%d"))
+        for i, (a, b) in enumerate(hops)
+    ]
+    dated = _fan_out(_route_edge, legs_on_dates, ITINERARY_CONCURRENCY)
+
+    legs = []
+    for (a, b), (from_code, to_code, day), edge in zip(hops, legs_on_dates, dated):
+        leg = {"from": from_code, "to": to_code, "date": day}
+        if edge is None:
+            edge = edges[(a, b)]
+            leg["estimate"] = True
+        leg.update({
+            "price": edge["price"],
+            "currency": edge["currency"],
+            "duration": format_duration(edge["duration"]),
+            "airline": edge["airline"]
+        })
+        legs.append(leg)
+
+    flights_total = round(sum(leg["price"] for leg in legs), 2)
+    breakdown = {"flights": flights_total, "currency": legs[0]["currency"], "nights": stops * nights}
+    if budget is not None:
+        breakdown.update({
+            "budget": budget,
+            "remaining": round(budget - flights_total, 2),
+            "within_budget": flights_total <= budget
+        })
 
-    except ResponseError as e:
-        print("Amadeus API error:", e.response.status_code, e.response.body)
-        return {"error": "Failed to fetch flights. Please check your input parameters."}
+    return {
+        "route": [codes[i] for i in order],
+        "method": method,
+        "optimized_for": metric,
+        "nights_per_city": nights,
+        "legs": legs,
+        "budget": breakdown
+    }
 
 
 def search_hotels(city_code, checkin_date, checkout_date):
-    response = amadeus.shopping.hotel_offers.get(
-        cityCode=city_code,
-        checkInDate=checkin_date,
-        checkOutDate=checkout_date,
-        adults=1
-    )
-    data = response.data
+    (checkin, checkin_status), (checkout, checkout_status) = resolve_date_range(checkin_date, checkout_date)
+    if checkin_status != "ok" or checkout_status != "ok":
+        return {"error": f"I couldn't use the dates '{checkin_date}' to '{checkout_date}'. Please provide valid upcoming check-in and check-out dates."}
+    if checkout <= checkin:
+        return {"error": "The check-out date must be after the check-in date."}
+    checkin_date = checkin.strftime("%Y-%m-%d")
+    checkout_date = checkout.strftime("%Y-%m-%d")
+
+    try:
+        hotels = shopping_cache.get_or_fetch(
+            ("hotels", city_code.strip().upper(), checkin_date, checkout_date, 1),
+            lambda: parse_hotel_offers(amadeus_get("hotel_offers", get_amadeus().shopping.hotel_offers,
+                cityCode=city_code,
+                checkInDate=checkin_date,
+                checkOutDate=checkout_date,
+                adults=1
+            ).data),
+            *HOTEL_OFFERS_TTL
+        )
+    except UpstreamUnavailable as e:
+        print("Amadeus unavailable:", e)
+        return {"error": "Hotel search is temporarily unavailable. Please try again in a moment."}
+    except AmadeusError as e:
+        print("Amadeus API error:", e.status_code, e.body)
+        return {"error": f"Failed to fetch hotels in {city_code}. Please check the city code and dates."}
 
     return {
-        "hotels": [
-            {
-                "name": hotel["hotel"]["name"],
-                "price": hotel["offers"][0]["price"]["total"],
-                "checkIn": hotel["offers"][0]["checkInDate"],
-                "checkOut": hotel["offers"][0]["checkOutDate"]
-            }
-            for hotel in data[:3]
-        ]
+        "total_offers": len(hotels),
+        "hotels": rank_hotels(hotels, HOTEL_RESULTS)
     }
 
 def recommend_destinations(purpose, budget):
@@ -138,20 +490,53 @@ def calculate_travel_budget(flight_cost, hotel_cost, nights, activities_cost):
     return {"total_estimate": total}
 
 
+def _fuzzy_place(city_name):
+    # Offline typo fallback, only once Amadeus has no answer or cannot be reached
+    place = get_gazetteer().fuzzy_lookup(city_name)
+    if place:
+        print(f"[DEBUG] fuzzy gazetteer match for {city_name!r}: {place.city}")
+    return place
+
+
 def get_coordinates(city_name):
-    try:
-        response = amadeus.reference_data.locations.get(
-            keyword=city_name,
-            subType="CITY"
-        )
-        if response.data:
-            geo = response.data[0]["geoCode"]
-            return geo["latitude"], geo["longitude"]
-        else:
-            return None, None
-    except ResponseError as e:
-        return None, None
-def recommend_tours(city=None, start_date=None, end_date=None, category=None, user_location=None):
+    place = get_gazetteer().lookup(city_name)
+    if place:
+        return place.lat, place.lon
+
+    key = ("coords", normalize_city(city_name))
+    coords = location_cache.get(key)
+    if coords is MISSING:
+        try:
+            response = amadeus_get("locations", get_amadeus().reference_data.locations,
+                keyword=city_name,
+                subType="CITY"
+            )
+            if response.data:
+                geo = response.data[0]["geoCode"]
+                coords = geo["latitude"], geo["longitude"]
+                location_cache.set(key, coords)
+            else:
+                coords = None, None
+                location_cache.set(key, coords, ttl=NEGATIVE_TTL)
+        except AmadeusError as e:
+            print("Coordinates lookup failed:", e.status_code, e.body)
+            coords = None, None
+        except UpstreamUnavailable:
+            # Amadeus is down or the turn is out of time: a close offline match still helps,
+            # otherwise the caller reports the outage
+            place = _fuzzy_place(city_name)
+            if place:
+                return place.lat, place.lon
+            raise
+
+    if coords[0] is None:
+        place = _fuzzy_place(city_name)
+        if place:
+            return place.lat, place.lon
+    return coords
+
+def recommend_tours(city=None, start_date=None, end_date=None, category=None, user_location=None,
+                    page=1, page_size=TOURS_PAGE_SIZE):
     if not city and user_location:
         lat = user_location.get("latitude")
         lon = user_location.get("longitude")
@@ -161,52 +546,77 @@ def recommend_tours(city=None, start_date=None, end_date=None, category=None, us
     if not city:
         return {"error": "City is required and could not be inferred from location."}
 
+    # Normalize whatever the model passed ("24th May", "next friday") to ISO when possible
+    (start, _), (end, _) = resolve_date_range(start_date, end_date)
+    # Activities longer than the trip window (a 3-day safari on a 1-day visit) are left out
+    max_minutes = (end - start).days * 1440 + 1440 if start and end and end >= start else None
+
     latitude, longitude = get_coordinates(city)
     if not latitude or not longitude:
         return {"error": f"Could not find coordinates for {city}"}
 
+    # One fetch per ~5 km geohash cell, whatever the dates or category; the cached index
+    # answers every later question about the same area locally
+    cell = geohash(float(latitude), float(longitude))
     try:
-        response = amadeus.shopping.activities.get(
-            latitude=latitude,
-            longitude=longitude,
-            startDate=start_date,
-            endDate=end_date
+        index = shopping_cache.get_or_fetch(
+            ("activities", cell),
+            lambda: _fetch_activity_index(cell),
+            *ACTIVITIES_TTL
         )
-        data = response.data
-
-        filtered = []
-        for activity in data:
-            name = activity.get("name", "").lower()
-            desc = activity.get("shortDescription", "").lower()
-            if not category or category.lower() in name or category.lower() in desc:
-                filtered.append({
-                    "name": activity["name"],
-                    "shortDescription": activity.get("shortDescription", "No description"),
-                    "price": activity["price"]["amount"],
-                    "currency": activity["price"]["currencyCode"],
-                    "bookingLink": activity["bookingLink"]
-                })
-            if len(filtered) >= 5:
-                break
+    except UpstreamUnavailable as e:
+        print("Amadeus unavailable:", e)
+        return {"error": "Tour search is temporarily unavailable. Please try again in a moment."}
+    except AmadeusError as e:
+        print("Amadeus API error:", e.status_code, e.body)
+        return {"error": f"Failed to fetch activities for {city}."}
 
-        return {
-    "activities": filtered or [{"message": "No matching activities found."}],
-    "city": city
-}
+    page = max(1, int(page or 1))
+    page_size = min(max(1, int(page_size or TOURS_PAGE_SIZE)), TOURS_MAX_PAGE_SIZE)
+    total, matches = index.search(category, max_minutes, offset=(page - 1) * page_size, limit=page_size)
+
+    return {
+        "activities": [activity.to_dict() for activity in matches] or [{"message": "No matching activities found."}],
+        "city": city,
+        "total_matches": total,
+        "page": page,
+        "has_more": page * page_size < total
+    }
+
+
+def _fetch_activity_index(cell):
+    latitude, longitude = geohash_center(cell)
+    data = amadeus_get("activities", get_amadeus().shopping.activities,
+        latitude=round(latitude, 5),
+        longitude=round(longitude, 5),
+        radius=ACTIVITY_RADIUS_KM
+    ).data
+    return ActivityIndex(parse_activities(data))
 
-    except Exception as e:
-        return {"error": str(e)}
 
 def reverse_geocode(lat, lon):
+    place = get_gazetteer().nearest(lat, lon)
+    if place:
+        return place.city
+
+    key = ("reverse",) + geo_key(lat, lon)
+    cached = location_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
     try:
-        response = amadeus.reference_data.locations.reverse_geocoding.get(
+        response = amadeus_get("reverse_geocoding", get_amadeus().reference_data.locations.reverse_geocoding,
             latitude=lat,
             longitude=lon
         )
         if response.data:
-            return response.data[0]["address"]["cityName"]
+            city = response.data[0]["address"]["cityName"]
+            location_cache.set(key, city)
+            return city
+        location_cache.set(key, None, ttl=NEGATIVE_TTL)
         return None
-    except Exception as e:
+    except AmadeusError as e:
+        print("Reverse geocoding failed:", e.status_code, e.body)
         return None
     
 def get_iata_code(city_name):
@@ -214,14 +624,35 @@ def get_iata_code(city_name):
     if isinstance(city_name, str) and len(city_name) == 3 and city_name.isalpha() and city_name.isupper():
         return city_name
 
-    try:
-        response = amadeus.reference_data.locations.get(
-            keyword=city_name,
-            subType="CITY"
-        )
-        if response.data:
-            return response.data[0]["iataCode"]
-        return None
-    except Exception as e:
-        print("IATA lookup failed:", e)
-        return None
+    # Exact names and aliases from the offline gazetteer, then Amadeus; fuzzy matching last
+    place = get_gazetteer().lookup(city_name)
+    if place:
+        return place.iata
+
+    key = ("iata", normalize_city(city_name))
+    code = location_cache.get(key)
+    if code is MISSING:
+        try:
+            response = amadeus_get("locations", get_amadeus().reference_data.locations,
+                keyword=city_name,
+                subType="CITY"
+            )
+            if response.data:
+                code = response.data[0]["iataCode"]
+                location_cache.set(key, code)
+            else:
+                code = None
+                location_cache.set(key, None, ttl=NEGATIVE_TTL)
+        except AmadeusError as e:
+            print("IATA lookup failed:", e.status_code, e.body)
+            code = None
+        except UpstreamUnavailable:
+            place = _fuzzy_place(city_name)
+            if place:
+                return place.iata
+            raise
+
+    if code is None:
+        place = _fuzzy_place(city_name)
+        return place.iata if place else None
+    return code
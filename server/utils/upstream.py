@@ -0,0 +1,287 @@
+import contextvars
+import io
+import os
+import queue
+import random
+import threading
+import time
+
+# Shared upstream-access primitives: a keep-alive connection pool for the Amadeus SDK,
+# a request-level deadline budget, jittered retry backoff and per-endpoint circuit breakers.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_deadline = contextvars.ContextVar("upstream_deadline", default=None)
+_call_timeout = contextvars.ContextVar("upstream_call_timeout", default=None)
+
+
+class UpstreamUnavailable(Exception):
+    # Raised instead of calling an upstream whose circuit is open
+    pass
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    pass
+
+
+def set_deadline(seconds):
+    # Budget for the whole turn; every upstream call gets at most what is left of it
+    _deadline.set(time.monotonic() + seconds)
+
+
+def remaining():
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def budget(timeout):
+    # min(endpoint timeout, time left in the turn); raises once the turn is out of time
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(timeout, left) if timeout else left
+
+
+def backoff_delay(attempt, base=0.25, cap=4.0):
+    # "Full jitter" exponential backoff
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half_open" and self._trial_in_flight):
+                raise UpstreamUnavailable(f"{self.name} is temporarily unavailable")
+            if state == "half_open":
+                # Let a single trial request through to probe recovery
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        # The call ended without an answer either way (e.g. it was cancelled); let the next
+        # request probe again instead of leaving the breaker half-open forever
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    self.trips += 1
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {"open": int(self.state == "open"), "failures": self.failures, "trips": self.trips}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, **options):
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **options)
+        return breaker
+
+
+def breaker_stats():
+    with _breakers_lock:
+        return {name: breaker.stats() for name, breaker in _breakers.items()}
+
+
+def call_with_retries(name, fn, is_retryable, attempts=3, timeout=None):
+    # Sync upstream call: circuit breaker, per-call timeout within the turn budget,
+    # and jittered retries on retryable failures
+    breaker = get_breaker(name)
+    for attempt in range(attempts):
+        call_timeout = budget(timeout)
+        breaker.before_call()
+        token = _call_timeout.set(call_timeout)
+        try:
+            result = fn()
+        except Exception as e:
+            retryable = is_retryable(e)
+            if retryable:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if not retryable or attempt == attempts - 1:
+                raise
+            delay = backoff_delay(attempt)
+            left = remaining()
+            if left is not None and left <= delay:
+                raise
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+        finally:
+            _call_timeout.reset(token)
+
+
+class RateLimiter:
+    # Token bucket shared by all threads calling one upstream, so fan-out searches stay
+    # under the provider's requests-per-second quota instead of collecting 429s
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        # At least one whole token, or a fractional rate could never let a request through
+        self.burst = max(1.0, float(burst or rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            left = remaining()
+            if left is not None and left <= wait:
+                raise DeadlineExceeded("Request deadline exceeded while rate limited")
+            time.sleep(wait)
+
+
+class _BufferedResponse:
+    # Fully-read stand-in for what urlopen returns, so the connection can go back to the pool
+    def __init__(self, response, body, url):
+        self.status = self.code = response.status
+        self.reason = self.msg = response.reason
+        self.headers = response.msg
+        self.url = url
+        self._body = io.BytesIO(body)
+
+    def read(self, *args):
+        return self._body.read(*args)
+
+    def getheaders(self):
+        return list(self.headers.items())
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.status
+
+    def geturl(self):
+        return self.url
+
+    def close(self):
+        self._body.close()
+
+
+class PooledHTTP:
+    # Drop-in for urllib's urlopen (the Amadeus SDK's `http` option) that keeps
+    # connections alive per host instead of opening a new TLS connection per call
+    def __init__(self, max_idle_per_host=16, timeout=15.0):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._pools = {}
+        self._lock = threading.Lock()
+        # Sockets inherited across a fork are never reused by the child
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, key):
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = queue.LifoQueue(maxsize=self.max_idle_per_host)
+            return pool
+
+    def _connect(self, scheme, host, port, timeout):
+        import http.client
+
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def __call__(self, request):
+        # http.client (and the ssl/email modules behind it) load with the first request
+        import http.client
+        import socket
+        from urllib.error import HTTPError, URLError
+        from urllib.parse import urlsplit
+
+        url = urlsplit(request.full_url)
+        port = url.port or (443 if url.scheme == "https" else 80)
+        key = (url.scheme, url.hostname, port)
+        path = url.path + (f"?{url.query}" if url.query else "")
+        timeout = _call_timeout.get() or budget(self.timeout)
+        headers = dict(request.header_items())
+        pool = self._pool(key)
+
+        for attempt in range(2):
+            try:
+                conn, reused = pool.get_nowait(), True
+            except queue.Empty:
+                conn, reused = self._connect(url.scheme, url.hostname, port, timeout), False
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+
+            try:
+                conn.request(request.get_method(), path, body=request.data, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                conn.close()
+                if reused and attempt == 0:
+                    # The server closed an idle keep-alive connection; retry on a fresh one
+                    continue
+                raise URLError(e)
+            except (socket.timeout, OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise URLError(e)
+
+            if response.will_close:
+                conn.close()
+            else:
+                try:
+                    pool.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+
+            if response.status >= 400:
+                # Same as urlopen, which the SDK expects to raise for error statuses
+                raise HTTPError(request.full_url, response.status, response.reason, response.msg, io.BytesIO(body))
+            return _BufferedResponse(response, body, request.full_url)
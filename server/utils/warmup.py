@@ -0,0 +1,20 @@
+import time
+
+from utils.dates import parse_and_validate_date
+from utils.gazetteer import get_gazetteer
+from utils.history import count_text_tokens
+from utils.router import get_router
+
+
+def warm_up():
+    # Loads everything that is otherwise built lazily on the first request. Run in the
+    # master before workers fork (see gunicorn.conf.py), so it must stay offline-only:
+    # no upstream calls, no sockets kept open and no background threads.
+    start = time.perf_counter()
+    get_gazetteer()
+    get_router().route("flights from Nairobi to Paris next friday")
+    # The first phrase takes the regex fast path; the second loads dateparser's language data
+    parse_and_validate_date("next friday")
+    parse_and_validate_date("the first of next month")
+    count_text_tokens("warm up the tokenizer")
+    print(f"[DEBUG] warm-up finished in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,10 @@
+from app import app, get_client
+from utils.tools import get_amadeus
+from utils.warmup import warm_up
+
+# Production entry point (see gunicorn.conf.py): gunicorn -c gunicorn.conf.py wsgi:app
+warm_up()
+# Startup imports are kept lazy for quick cold starts; a pre-forking server pays for the
+# API clients once here instead (neither opens a connection until its first request)
+get_client()
+get_amadeus()